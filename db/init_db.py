@@ -15,6 +15,7 @@ sys.path.insert(0, str(project_root))
 from sqlalchemy import create_engine, MetaData, inspect
 from sqlalchemy.exc import OperationalError
 from db.settings import db_settings
+from db.tables.excel_workflow_responses import ExcelWorkflowResponses
 from db.tables.excel_workflow_sessions import ExcelWorkflowSessions
 from db.tables.workflow_settings import WorkflowSettings
 from agno.utils.log import logger
@@ -43,6 +44,11 @@ def init_database():
             logger.info("Creating excel_workflow_sessions table...")
             ExcelWorkflowSessions.__table__.create(engine, checkfirst=True)
         
+        if 'excel_workflow_responses' not in existing_tables:
+            tables_to_create.append('excel_workflow_responses')
+            logger.info("Creating excel_workflow_responses table...")
+            ExcelWorkflowResponses.__table__.create(engine, checkfirst=True)
+        
         if 'workflow_settings' not in existing_tables:
             tables_to_create.append('workflow_settings')
             logger.info("Creating workflow_settings table...")
@@ -59,7 +65,7 @@ def init_database():
         logger.info(f"Final tables: {final_tables}")
         
         # Check if required tables exist
-        required_tables = ['excel_workflow_sessions', 'workflow_settings']
+        required_tables = ['excel_workflow_sessions', 'excel_workflow_responses', 'workflow_settings']
         missing_tables = [table for table in required_tables if table not in final_tables]
         
         if missing_tables:
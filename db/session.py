@@ -1,4 +1,5 @@
-from typing import Generator
+from contextlib import contextmanager
+from typing import Generator, Iterator
 import os
 
 from sqlalchemy.engine import Engine, create_engine
@@ -22,14 +23,28 @@ if db_url.startswith("sqlite"):
         db_url,
         connect_args={"check_same_thread": False},  # Allow multiple threads
         pool_pre_ping=True,
+        pool_size=20,
+        max_overflow=30,
+        pool_use_lifo=True,  # Reuse the most recently returned (warm) connection first
+        pool_recycle=1800,
         echo=False,  # Set to True for SQL debugging
     )
 else:
     # For other databases (fallback)
-    db_engine: Engine = create_engine(db_url, pool_pre_ping=True)
+    db_engine: Engine = create_engine(
+        db_url,
+        pool_pre_ping=True,
+        pool_size=20,
+        max_overflow=30,
+        pool_use_lifo=True,
+        pool_recycle=1800,
+    )
 
 # Create a SessionLocal class
-SessionLocal: sessionmaker[Session] = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+# Objects stay readable after commit without another SELECT to refresh them
+SessionLocal: sessionmaker[Session] = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=db_engine
+)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -44,3 +59,23 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    Context manager that provides a database session.
+
+    The session is rolled back if the block raises and is always closed on exit.
+
+    Yields:
+        Session: An SQLAlchemy database session.
+    """
+    db: Session = SessionLocal()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
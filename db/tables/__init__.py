@@ -1,3 +1,4 @@
 from db.tables.base import Base
 from db.tables.workflow_settings import WorkflowSettings
 from db.tables.excel_workflow_sessions import ExcelWorkflowSessions
+from db.tables.excel_workflow_responses import ExcelWorkflowResponses
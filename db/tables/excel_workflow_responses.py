@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, Text, DateTime, Integer
+from sqlalchemy.sql import func
+from db.tables.base import Base
+
+
+class ExcelWorkflowResponses(Base):
+    """Database table for storing the conversation history of Excel workflow sessions."""
+    
+    __tablename__ = "excel_workflow_responses"
+    
+    # Primary key - auto-incrementing so rows keep their insertion order
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # Session the response belongs to
+    session_id = Column(String(36), nullable=False, index=True)
+    
+    # Type of response (user, assistant, system)
+    response_type = Column(String(20), nullable=False)
+    
+    # Response content
+    content = Column(Text, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<ExcelWorkflowResponses(id={self.id}, session_id='{self.session_id}', response_type='{self.response_type}')>"
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Text, DateTime, Integer, Boolean
-from sqlalchemy.sql import func
+from sqlalchemy import Column, String, Text, DateTime, Integer, Boolean, Index
+from sqlalchemy.sql import func, text
 from db.tables.base import Base
 
 
@@ -41,6 +41,9 @@ class ExcelWorkflowSessions(Base):
     # Model ID used for processing
     model_id = Column(String(100), nullable=True)
     
+    # Summary data of a completed session (top keywords, categories, file info) as JSON
+    enhanced_data = Column(Text, nullable=True)
+    
     # Whether the session is active
     is_active = Column(Boolean, default=True, nullable=False)
     
@@ -49,5 +52,17 @@ class ExcelWorkflowSessions(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     completed_at = Column(DateTime(timezone=True), nullable=True)
     
+    __table_args__ = (
+        # Newest active sessions first, as listed by the session selector
+        Index(
+            "ix_excel_workflow_sessions_active_created_at",
+            "created_at",
+            sqlite_where=text("is_active"),
+            postgresql_where=text("is_active"),
+        ),
+        # Newest sessions of a single user
+        Index("ix_excel_workflow_sessions_user_id_created_at", "user_id", "created_at"),
+    )
+    
     def __repr__(self):
         return f"<ExcelWorkflowSessions(session_id='{self.session_id}', session_name='{self.session_name}')>"
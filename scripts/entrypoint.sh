@@ -33,7 +33,7 @@ fi
 if [[ "$MIGRATE_DB" = true || "$MIGRATE_DB" = True ]]; then
   echo "++++++++++++++++++++++++++++++++++++++++++++++++++++++++"
   echo "Migrating Database"
-  alembic -c db/alembic.ini revision --autogenerate -m "Auto-generated migration"
+  # Only apply the committed revisions; new revisions are generated during development
   alembic -c db/alembic.ini upgrade head
   echo "++++++++++++++++++++++++++++++++++++++++++++++++++++++++"
 fi
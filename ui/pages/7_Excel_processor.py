@@ -10,9 +10,11 @@ from agno.workflow import Workflow
 
 from ui.css import CUSTOM_CSS
 from ui.utils import (
+    MODEL_OPTIONS,
+    StreamThrottle,
     add_message,
     display_tool_calls,
-    initialize_workflow_session_state,
+    initialize_session_state,
     selected_model,
 )
 from workflows.excel_workflow import get_excel_processor
@@ -55,7 +57,8 @@ async def excel_session_selector(workflow, model_id: str):
             st.sidebar.markdown("**📋 Existing Sessions:**")
             
             # Create session options for selectbox (only existing sessions)
-            session_options = ["No session selected"] + [f"{s['session_name']} ({s['status']})" for s in sessions]
+            session_name_by_option = {f"{s['session_name']} ({s['status']})": s['session_name'] for s in sessions}
+            session_options = ["No session selected", *session_name_by_option]
             
             # Use a dynamic key to force reset when needed
             selector_key = "excel_session_selector_reset" if reset_selector else "excel_session_selector"
@@ -71,8 +74,8 @@ async def excel_session_selector(workflow, model_id: str):
             )
             
             if selected_session and selected_session != "No session selected":
-                # Extract session name from the selected option
-                session_name = selected_session.split(" (")[0]
+                # Look up the session name of the selected option
+                session_name = session_name_by_option[selected_session]
                 
                 # Load the selected session
                 session_data = workflow.get_session_by_name(session_name)
@@ -176,7 +179,7 @@ async def sidebar(workflow: Workflow):
 
     # New session button
     if st.sidebar.button("✨ New Session"):
-        await initialize_workflow_session_state(workflow_name)
+        await initialize_session_state(workflow_name, "workflow", reset=True)
         
         # Clear UI widget states by resetting their session state keys
         if "file_uploader" in st.session_state:
@@ -221,8 +224,7 @@ async def sidebar(workflow: Workflow):
     # If no custom instructions exist, get the default
     if current_instructions is None:
         from workflows.excel_workflow import ExcelProcessor
-        temp_workflow = ExcelProcessor()
-        current_instructions = temp_workflow._get_default_instructions()
+        current_instructions = ExcelProcessor.default_instructions
     
     # Instructions editor
     st.sidebar.markdown("**🤖 AI Agent Instructions**")
@@ -429,8 +431,8 @@ async def body() -> None:
             try:
                 # Generate session name
                 from workflows.excel_session_manager import ExcelSessionManager
-                session_manager = ExcelSessionManager()
-                session_name = session_manager.generate_session_name(uploaded_file.name, niche)
+                with ExcelSessionManager() as session_manager:
+                    session_name = session_manager.generate_session_name(uploaded_file.name, niche)
                 
                 # Add user message to chat
                 await add_message(workflow_name, "user", f"Processing Excel file: {uploaded_file.name}")
@@ -454,18 +456,7 @@ async def body() -> None:
                     
                     try:
                         # Get the current model ID from session state (already selected in sidebar)
-                        selected_model_key = st.session_state.get("model_selector", "openai/o4-mini")
-                        # Map the selected key to the actual model ID
-                        model_options = {
-                            "openai/o4-mini": "openai/o4-mini",
-                            "o3-mini": "o3-mini",
-                            "openai/gpt-5-mini": "openai/gpt-5-mini",
-                            "openai/gpt-5-nano": "openai/gpt-5-nano",
-                            "z-ai/glm-4.5": "z-ai/glm-4.5",
-                            "z-ai/glm-4.5-air": "z-ai/glm-4.5-air",
-                            "qwen/qwen3-235b-a22b-thinking-2507": "qwen/qwen3-235b-a22b-thinking-2507",
-                        }
-                        current_model_id = model_options.get(selected_model_key, "openai/o4-mini")
+                        current_model_id = st.session_state.get("model_selector", MODEL_OPTIONS[0])
                         
                         # Run the workflow with enhanced session management
                         run_response = workflow.run_workflow(
@@ -478,11 +469,14 @@ async def body() -> None:
                             model_id=current_model_id
                         )
 
+                        render_throttle = StreamThrottle()
                         for resp_chunk in run_response:
                             # Display response in real-time
                             if resp_chunk.content is not None:
                                 response += resp_chunk.content
-                                response_container.markdown(response)
+                                if render_throttle.ready():
+                                    response_container.markdown(response)
+                        response_container.markdown(response)
 
                         # Add the final response to the messages (but don't display again)
                         if workflow.run_response is not None and hasattr(workflow.run_response, 'tools'):
@@ -551,14 +545,16 @@ async def body() -> None:
         # Skip the last assistant message if it's the most recent one (to avoid duplication with real-time display)
         messages_to_display = messages[:-1] if messages and messages[-1]["role"] == "assistant" else messages
         
-        for message in messages_to_display:
+        for message_idx, message in enumerate(messages_to_display):
             if message["role"] in ["user", "assistant"]:
                 _content = message["content"]
                 if _content is not None:
                     with st.chat_message(message["role"]):
                         # Display tool calls if they exist in the message
                         if "tool_calls" in message and message["tool_calls"]:
-                            display_tool_calls(st.empty(), message["tool_calls"])
+                            display_tool_calls(
+                                st.empty(), message["tool_calls"], key_prefix=f"{workflow_name}_{message_idx}"
+                            )
                         st.markdown(_content)
     else:
         st.info("💬 No messages yet. Upload an Excel file and start processing to see the conversation history.")
@@ -679,9 +675,8 @@ async def body() -> None:
 
 
 async def main():
-    # Only initialize if not already present
-    if workflow_name not in st.session_state:
-        await initialize_workflow_session_state(workflow_name)
+    # Only initializes if not already present
+    await initialize_session_state(workflow_name, "workflow")
 
     # Initialize widget states if they are not already set
     if "chunk_size_selector" not in st.session_state:
@@ -9,10 +9,12 @@ from markdown_it import MarkdownIt
 from teams import get_enova_deep_research_team
 from ui.css import CUSTOM_CSS
 from ui.utils import (
+    StreamThrottle,
     add_message,
+    cached_chat_export,
     display_tool_calls,
     example_inputs,
-    initialize_team_session_state,
+    initialize_session_state,
     export_team_chat_history,
 )
 
@@ -68,21 +70,22 @@ async def body() -> None:
         await add_message(team_name, "user", prompt)
 
     ####################################################################
-    # Show example inputs
+    # Show example inputs (only while the chat is still empty)
     ####################################################################
-    await example_inputs(team_name)
+    if not st.session_state[team_name]["messages"]:
+        await example_inputs(team_name)
 
     ####################################################################
     # Display team messages
     ####################################################################
-    for message in st.session_state[team_name]["messages"]:
+    for message_idx, message in enumerate(st.session_state[team_name]["messages"]):
         if message["role"] in ["user", "assistant"]:
             _content = message["content"]
             if _content is not None:
                 with st.chat_message(message["role"]):
                     # Display tool calls if they exist in the message
                     if "tool_calls" in message and message["tool_calls"]:
-                        display_tool_calls(st.empty(), message["tool_calls"])
+                        display_tool_calls(st.empty(), message["tool_calls"], key_prefix=f"{team_name}_{message_idx}")
                     st.markdown(_content)
 
     ####################################################################
@@ -143,6 +146,8 @@ async def body() -> None:
                 try:
                     # Run the team and stream the response
                     run_response = await team.arun(user_message, stream=True)
+                    # Redraw the agent steps at most every 100ms while streaming
+                    steps_throttle = StreamThrottle()
                     try:
                         async for resp_chunk in run_response:
                             # Display tool calls if available
@@ -211,7 +216,8 @@ async def body() -> None:
                                     except Exception:
                                         pass
                                 # Re-render agent steps with latest streamed content
-                                render_agent_steps()
+                                if steps_throttle.ready():
+                                    render_agent_steps()
                             except Exception:
                                 pass
                             # Display response
@@ -246,7 +252,8 @@ async def body() -> None:
                                                 if current_title == "Editor Agent":
                                                     final_response += remaining
                                                 # Re-render agent steps
-                                                render_agent_steps()
+                                                if steps_throttle.ready():
+                                                    render_agent_steps()
                                         break
 
                                     else:
@@ -281,6 +288,8 @@ async def body() -> None:
                                         markers_seen = True
                                         # Render updated agent steps with the new section header
                                         render_agent_steps()
+                        # Show the latest streamed content skipped by the throttle
+                        render_agent_steps()
                     finally:
                         # Ensure async stream is properly closed to prevent sniffio/httpcore warnings
                         try:
@@ -449,7 +458,7 @@ async def body() -> None:
             fn = f"{team_name}_{st.session_state[team_name]['session_id']}.md"
         st.download_button(
             ":file_folder: Export Team Chat",
-            export_team_chat_history(team_name),
+            cached_chat_export(team_name, export_team_chat_history),
             file_name=fn,
             mime="text/markdown",
             key="export_team_chat_btn",
@@ -457,17 +466,14 @@ async def body() -> None:
 
 async def main():
     try:
-        await initialize_team_session_state(team_name)
+        await initialize_session_state(team_name, "team")
         await header()
         await body()
     except Exception as e:
         logger.error(f"Error in main: {e}", exc_info=True)
         st.error(f"An error occurred: {str(e)}")
 
-if __name__ == "__main__":
-    if check_password():
-        try:
-            asyncio.run(main())
-        except Exception as e:
-            logger.error(f"Error running main: {e}", exc_info=True)
-            st.error(f"Failed to start application: {str(e)}")
+# Streamlit executes the page as a script on every rerun, so run main directly.
+# main() already reports its own errors, so no outer try/except is needed.
+if check_password():
+    asyncio.run(main())
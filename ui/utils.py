@@ -1,4 +1,11 @@
-from typing import Any, Callable, Dict, List, Optional, Union
+import asyncio
+import functools
+from collections import OrderedDict
+import hashlib
+import io
+import os
+import time
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union
 
 import streamlit as st
 from agno.agent import Agent
@@ -13,61 +20,50 @@ from agno.document.reader.website_reader import WebsiteReader
 from agno.models.response import ToolExecution
 from agno.utils.log import logger
 
+# Model IDs offered in the sidebar model selector, the first one is the default
+MODEL_OPTIONS = (
+    "openai/o4-mini",
+    "o3-mini",
+    "openai/gpt-5-mini",
+    "openai/gpt-5-nano",
+    "z-ai/glm-4.5",
+    "z-ai/glm-4.5-air",
+    "qwen/qwen3-235b-a22b-thinking-2507",
+)
 
-async def initialize_agent_session_state(agent_name: str):
-    logger.info(f"---*--- Initializing session state for {agent_name} ---*---")
-    st.session_state[agent_name] = {
-        "agent": None,
-        "session_id": None,
-        "messages": [],
-    }
+# Number of knowledge sources (URLs or files) remembered per Agent to skip reloading them
+MAX_TRACKED_KNOWLEDGE_SOURCES = 64
 
+# Number of Agent/Workflow instances kept per browser session for fast session switching
+MAX_CACHED_INSTANCES = 8
 
-async def initialize_team_session_state(team_name: str):
-    logger.info(f"---*--- Initializing session state for {team_name} ---*---")
-    if team_name not in st.session_state:
-        st.session_state[team_name] = {
-            "team": None,
-            "session_id": None,
-            "messages": [],
-        }
-    else:
-        # Preserve existing state across reruns; only ensure required keys exist
-        if "team" not in st.session_state[team_name]:
-            st.session_state[team_name]["team"] = None
-        if "session_id" not in st.session_state[team_name]:
-            st.session_state[team_name]["session_id"] = None
-        if "messages" not in st.session_state[team_name]:
-            st.session_state[team_name]["messages"] = []
-
-
-async def initialize_workflow_session_state(workflow_name: str):
-    logger.info(f"---*--- Initializing session state for {workflow_name} ---*---")
-    st.session_state[workflow_name] = {
-        "workflow": None,
-        "session_id": None,
-        "messages": [],
-    }
+
+async def initialize_session_state(
+    name: str, kind: Literal["agent", "team", "workflow"], reset: bool = False
+) -> None:
+    """Initialize the session state of an Agent, Team or Workflow.
+
+    Existing state is preserved across reruns and only missing keys are filled in,
+    unless reset is True in which case the state is recreated.
+    """
+    state = None if reset else st.session_state.get(name)
+    if state is None:
+        logger.info(f"---*--- Initializing session state for {name} ---*---")
+        st.session_state[name] = {kind: None, "session_id": None, "messages": []}
+        return
+    state.setdefault(kind, None)
+    state.setdefault("session_id", None)
+    state.setdefault("messages", [])
 
 
 async def selected_model() -> str:
     """Display a model selector in the sidebar."""
-    model_options = {
-        "openai/o4-mini": "openai/o4-mini",
-        "o3-mini": "o3-mini",
-        "openai/gpt-5-mini": "openai/gpt-5-mini",
-        "openai/gpt-5-nano": "openai/gpt-5-nano",
-        "z-ai/glm-4.5": "z-ai/glm-4.5",
-        "z-ai/glm-4.5-air": "z-ai/glm-4.5-air",
-        "qwen/qwen3-235b-a22b-thinking-2507": "qwen/qwen3-235b-a22b-thinking-2507",
-    }
-    selected_model = st.sidebar.selectbox(
+    return st.sidebar.selectbox(
         "Choose a model",
-        options=list(model_options.keys()),
+        options=MODEL_OPTIONS,
         index=0,
         key="model_selector",
     )
-    return model_options[selected_model]
 
 
 async def add_message(
@@ -77,38 +73,76 @@ async def add_message(
     tool_calls: Optional[Union[List[Dict[str, Any]], List[ToolExecution]]] = None,
 ) -> None:
     """Safely add a message to the Agent's session state and persist to workflow session state if available."""
-    st.session_state[agent_name]["messages"].append({"role": role, "content": content, "tool_calls": tool_calls})
+    state = st.session_state[agent_name]
+    state["messages"].append({"role": role, "content": content, "tool_calls": tool_calls})
     # Persist messages to workflow session state if available
-    workflow = st.session_state[agent_name].get("workflow")
+    workflow = state.get("workflow")
     if workflow is not None and hasattr(workflow, "session_state"):
-        if "messages" not in workflow.session_state:
-            workflow.session_state["messages"] = []
-        workflow.session_state["messages"] = st.session_state[agent_name]["messages"]
+        workflow.session_state["messages"] = state["messages"]
+
+
+class StreamThrottle:
+    """Rate limit redraws of streamed content, so a fast token stream doesn't redraw on every chunk.
+
+    Callers should redraw once more after the stream ends so the final content is shown.
+    """
+
+    def __init__(self, min_interval: float = 0.1):
+        self.min_interval = min_interval
+        self._last_render = 0.0
+
+    def ready(self) -> bool:
+        """Return True if at least min_interval seconds have passed since the last redraw."""
+        now = time.monotonic()
+        if now - self._last_render < self.min_interval:
+            return False
+        self._last_render = now
+        return True
+
+
+def _normalize_tool_call(tool_call: Union[Dict[str, Any], ToolExecution]) -> Tuple[Optional[str], Any, Any, Any]:
+    """Return (name, args, result, metrics) for a ToolExecution or a tool call dictionary."""
+    if isinstance(tool_call, ToolExecution):
+        return tool_call.tool_name, tool_call.tool_args, tool_call.result, getattr(tool_call, "metrics", None)
+    return (
+        tool_call.get("tool_name") or tool_call.get("name", "Unknown Tool"),
+        tool_call.get("tool_args", tool_call.get("arguments")),
+        tool_call.get("content"),
+        tool_call.get("metrics"),
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _pretty_tool_name(tool_name: Optional[str]) -> str:
+    """Human-readable tool name, e.g. "search_web" -> "Search Web"."""
+    return tool_name.replace("_", " ").title() if tool_name else "Tool"
+
 
+def _looks_like_json(text: str) -> bool:
+    """Check whether text starts with a JSON object or array, without copying it like strip() does."""
+    for char in text:
+        if not char.isspace():
+            return char in "{["
+    return False
 
-def display_tool_calls(tool_calls_container, tools):
+
+def display_tool_calls(tool_calls_container, tools, key_prefix: Optional[str] = None):
     """Display tool calls in a streamlit container with expandable sections.
 
     Args:
         tool_calls_container: Streamlit container to display the tool calls
         tools: List of tool call dictionaries containing name, args, content, and metrics
+        key_prefix: Stable widget key prefix. When set, results are only rendered once the user
+            toggles them on, so large results are not serialized on every rerun. Leave unset while
+            streaming, where the same tool calls are redrawn several times in one run.
     """
     if not tools:
         return
 
     try:
         with tool_calls_container.container():
-            for tool_call in tools:
-                if isinstance(tool_call, ToolExecution):
-                    tool_name = tool_call.tool_name
-                    tool_args = tool_call.tool_args
-                    content = tool_call.result if tool_call.result else None
-                    metrics = getattr(tool_call, "metrics", None)
-                else:
-                    tool_name = tool_call.get("tool_name", "Unknown Tool")
-                    tool_args = tool_call.get("tool_args", {})
-                    content = tool_call.get("content")
-                    metrics = tool_call.get("metrics", {})
+            for i, tool_call in enumerate(tools):
+                tool_name, tool_args, content, metrics = _normalize_tool_call(tool_call)
 
                 # Add timing information
                 execution_time_str = "N/A"
@@ -122,7 +156,7 @@ def display_tool_calls(tool_calls_container, tools):
                     pass
 
                 with st.expander(
-                    f"🛠️ {tool_name.replace('_', ' ').title() if tool_name else 'Tool'} ({execution_time_str})",
+                    f"🛠️ {_pretty_tool_name(tool_name)} ({execution_time_str})",
                     expanded=False,
                 ):
                     # Show query with syntax highlighting
@@ -134,12 +168,14 @@ def display_tool_calls(tool_calls_container, tools):
                         st.markdown("**Arguments:**")
                         st.json(tool_args)
 
-                    if content:
+                    if content and (
+                        key_prefix is None or st.toggle("Show results", key=f"{key_prefix}_tool_{i}")
+                    ):
                         st.markdown("**Results:**")
                         try:
                             # Check if content is already a dictionary or can be parsed as JSON
                             if isinstance(content, dict) or (
-                                isinstance(content, str) and content.strip().startswith(("{", "["))
+                                isinstance(content, str) and _looks_like_json(content)
                             ):
                                 st.json(content)
                             else:
@@ -187,69 +223,225 @@ async def example_inputs(agent_name: str) -> None:
                 )
 
 
+@st.cache_resource
+def _get_readers() -> Dict[str, Reader]:
+    """Document readers keyed by file extension, created once per process."""
+    return {
+        "pdf": PDFReader(),
+        "csv": CSVReader(),
+        "txt": TextReader(),
+        "docx": DocxReader(),
+    }
+
+
+@st.cache_resource
+def _get_web_scraper() -> WebsiteReader:
+    """Website reader used for the knowledge base, created once per process."""
+    return WebsiteReader(max_links=2, max_depth=1)
+
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def _scrape_url(url: str) -> List[Document]:
+    """Scrape a website into documents, memoized per URL."""
+    return _get_web_scraper().read(url)
+
+
+# Keyed by the raw upload bytes, so the number of kept uploads is bounded
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=32)
+def _parse_upload(file_bytes: bytes, file_name: str, file_type: str) -> List[Document]:
+    """Parse an uploaded document into documents, memoized by its content."""
+    file = io.BytesIO(file_bytes)
+    # Readers derive the document name from the file name
+    file.name = file_name
+    return _get_readers()[file_type].read(file)
+
+
+def _source_hash(source: bytes) -> str:
+    """Hash of a knowledge source (URL or file content) used to track it in the loaded-sources LRU."""
+    return hashlib.blake2b(source, digest_size=16).hexdigest()
+
+
+def _is_source_loaded(agent_name: str, source_hash: str) -> bool:
+    """Check whether a knowledge source was already loaded this session.
+
+    Sources are tracked by content hash in a bounded LRU, so different files with the same
+    name don't collide and long-running sessions don't accumulate flags.
+
+    Returns:
+        bool: True if the source was already loaded and can be skipped
+    """
+    loaded_sources: OrderedDict[str, None] = st.session_state[agent_name].setdefault("loaded_sources", OrderedDict())
+    if source_hash in loaded_sources:
+        loaded_sources.move_to_end(source_hash)
+        return True
+    return False
+
+
+def _mark_source_loaded(agent_name: str, source_hash: str) -> None:
+    """Record a knowledge source as loaded, once its documents are in the knowledge base."""
+    loaded_sources: OrderedDict[str, None] = st.session_state[agent_name].setdefault("loaded_sources", OrderedDict())
+    loaded_sources[source_hash] = None
+    while len(loaded_sources) > MAX_TRACKED_KNOWLEDGE_SOURCES:
+        loaded_sources.popitem(last=False)
+
+
 async def knowledge_widget(agent_name: str, agent: Agent) -> None:
     """Display a knowledge widget in the sidebar."""
 
     if agent is not None and agent.knowledge is not None:
+        state = st.session_state[agent_name]
         # Add websites to knowledge base
-        if "url_scrape_key" not in st.session_state:
-            st.session_state[agent_name]["url_scrape_key"] = 0
-        input_url = st.sidebar.text_input(
-            "Add URL to Knowledge Base", type="default", key=st.session_state[agent_name]["url_scrape_key"]
-        )
+        state.setdefault("url_scrape_key", 0)
+        input_url = st.sidebar.text_input("Add URL to Knowledge Base", type="default", key=state["url_scrape_key"])
         add_url_button = st.sidebar.button("Add URL")
         if add_url_button:
             if input_url is not None:
                 alert = st.sidebar.info("Processing URLs...", icon="ℹ️")
-                if f"{input_url}_scraped" not in st.session_state:
-                    scraper = WebsiteReader(max_links=2, max_depth=1)
-                    web_documents: List[Document] = scraper.read(input_url)
+                url_hash = _source_hash(input_url.encode())
+                if _is_source_loaded(agent_name, url_hash):
+                    st.sidebar.info("Website already in the knowledge base")
+                else:
+                    web_documents: List[Document] = await asyncio.to_thread(_scrape_url, input_url)
                     if web_documents:
-                        agent.knowledge.load_documents(web_documents, upsert=True)
+                        await asyncio.to_thread(agent.knowledge.load_documents, web_documents, upsert=True)
+                        # Only mark the source once it's loaded, so failed attempts can be retried
+                        _mark_source_loaded(agent_name, url_hash)
                     else:
                         st.sidebar.error("Could not read website")
-                    st.session_state[f"{input_url}_uploaded"] = True
                 alert.empty()
 
         # Add documents to knowledge base
-        if "file_uploader_key" not in st.session_state:
-            st.session_state[agent_name]["file_uploader_key"] = 100
+        state.setdefault("file_uploader_key", 100)
         uploaded_file = st.sidebar.file_uploader(
             "Add a Document (.pdf, .csv, .txt, or .docx)",
-            key=st.session_state[agent_name]["file_uploader_key"],
+            key=state["file_uploader_key"],
         )
         if uploaded_file is not None:
             alert = st.sidebar.info("Processing document...", icon="🧠")
-            document_name = uploaded_file.name.split(".")[0]
-            if f"{document_name}_uploaded" not in st.session_state:
-                file_type = uploaded_file.name.split(".")[-1].lower()
-
-                reader: Reader
-                if file_type == "pdf":
-                    reader = PDFReader()
-                elif file_type == "csv":
-                    reader = CSVReader()
-                elif file_type == "txt":
-                    reader = TextReader()
-                elif file_type == "docx":
-                    reader = DocxReader()
-                else:
-                    st.sidebar.error("Unsupported file type")
-                    return
-                uploaded_file_documents: List[Document] = reader.read(uploaded_file)
+            file_type = os.path.splitext(uploaded_file.name)[1][1:].lower()
+            if file_type not in _get_readers():
+                st.sidebar.error("Unsupported file type")
+                return
+            file_bytes = uploaded_file.getvalue()
+            # Hash the upload once for both the check and the marking
+            file_hash = _source_hash(file_bytes)
+            if _is_source_loaded(agent_name, file_hash):
+                st.sidebar.info("Document already in the knowledge base")
+            else:
+                uploaded_file_documents: List[Document] = await asyncio.to_thread(
+                    _parse_upload, file_bytes, uploaded_file.name, file_type
+                )
                 if uploaded_file_documents:
-                    agent.knowledge.load_documents(uploaded_file_documents, upsert=True)
+                    await asyncio.to_thread(agent.knowledge.load_documents, uploaded_file_documents, upsert=True)
+                    _mark_source_loaded(agent_name, file_hash)
                 else:
                     st.sidebar.error("Could not read document")
-                st.session_state[f"{document_name}_uploaded"] = True
             alert.empty()
 
         # Load and delete knowledge
         if st.sidebar.button("🗑️ Delete Knowledge"):
             agent.knowledge.delete()
+            state.pop("loaded_sources", None)
             st.sidebar.success("Knowledge deleted!")
 
 
+def _storage_key(storage: Any) -> Tuple[str, str, str]:
+    """Stable identity of a storage (type, database URL and table) used to key its cached sessions.
+
+    id(storage) can't be used: evicted instances are garbage-collected and their ids reused.
+    """
+    db_engine = getattr(storage, "db_engine", None)
+    db_url = str(db_engine.url) if db_engine is not None else ""
+    return type(storage).__name__, db_url, str(getattr(storage, "table_name", ""))
+
+
+@st.cache_resource(ttl=30, show_spinner=False)
+def _load_sessions(storage_key: Tuple[str, str, str], _storage: Any) -> List[Any]:
+    """Saved sessions of a storage, cached briefly so reruns don't hit the database every time.
+
+    st.cache_resource is used so the session objects are not pickled and copied on every rerun.
+    """
+    return _storage.get_all_sessions()
+
+
+def _get_or_create_instance(name: str, get_instance: Callable, user_id: str, model_id: str, session_id: str) -> Any:
+    """Reuse an Agent/Workflow built earlier in this browser session for the same session and model.
+
+    Instances are stateful, so they are kept in st.session_state instead of being shared
+    across users with st.cache_resource.
+    """
+    instances: Dict[Any, Any] = st.session_state[name].setdefault("instances", {})
+    cache_key = (user_id, model_id, session_id)
+    instance = instances.pop(cache_key, None)
+    if instance is None:
+        instance = get_instance(user_id=user_id, model_id=model_id, session_id=session_id)
+    # Re-insert so the most recently used instance is last, then evict the oldest ones.
+    instances[cache_key] = instance
+    while len(instances) > MAX_CACHED_INSTANCES:
+        instances.pop(next(iter(instances)))
+    return instance
+
+
+def _session_switcher(
+    name: str, instance_key: str, storage: Any, get_instance: Callable, user_id: str, model_id: str
+) -> bool:
+    """Display the session selectbox in the sidebar and reload the Agent/Workflow if another session is selected.
+
+    Args:
+        name: Key of the Agent/Workflow in st.session_state
+        instance_key: Key under which the Agent/Workflow instance is stored
+        storage: Storage to read the saved sessions from
+        get_instance: Factory used to recreate the Agent/Workflow for the selected session
+
+    Returns:
+        bool: False if there are no saved sessions to select from
+    """
+    state = st.session_state[name]
+    # Get all saved sessions, refreshing this storage's entry if it predates the current session.
+    storage_key = _storage_key(storage)
+    saved_sessions = _load_sessions(storage_key, storage)
+    current_session_id = state["session_id"]
+    if current_session_id is not None and all(s.session_id != current_session_id for s in saved_sessions):
+        # A new chat isn't saved until its first run, so only re-read once per new message
+        # instead of on every rerun.
+        refresh_marker = (current_session_id, len(state["messages"]))
+        if state.get("sessions_refreshed_for") != refresh_marker:
+            state["sessions_refreshed_for"] = refresh_marker
+            _load_sessions.clear(storage_key, storage)
+            saved_sessions = _load_sessions(storage_key, storage)
+    if not saved_sessions:
+        st.sidebar.info("No saved sessions found.")
+        return False
+
+    # Get session names if available, otherwise use IDs.
+    sessions_list = [
+        {"id": s.session_id, "display_name": (s.session_data or {}).get("session_name") or s.session_id}
+        for s in saved_sessions
+    ]
+    # Map display names to IDs; the first session wins if two share a name.
+    name_to_id = {s["display_name"]: s["id"] for s in reversed(sessions_list)}
+
+    # Display session selector.
+    st.sidebar.markdown("#### 💬 Session")
+    selected_session = st.sidebar.selectbox(
+        "Session",
+        options=[s["display_name"] for s in sessions_list],
+        key="session_selector",
+        label_visibility="collapsed",
+    )
+
+    # Find the selected session ID.
+    selected_session_id = name_to_id[selected_session]
+    # Update the Agent/Workflow session if it has changed.
+    if current_session_id != selected_session_id:
+        logger.info(f"---*--- Loading {name} session: {selected_session_id} ---*---")
+        state[instance_key] = _get_or_create_instance(
+            name, get_instance, user_id, model_id, selected_session_id
+        )
+        st.rerun()
+    return True
+
+
 async def session_selector_workflow(workflow_name: str, workflow: Workflow, get_workflow: Callable, user_id: str, model_id: str) -> None:
     """Display a session selector in the sidebar, if a new session is selected, the workflow is restarted with the new session."""
 
@@ -257,45 +449,51 @@ async def session_selector_workflow(workflow_name: str, workflow: Workflow, get_
         return
 
     try:
-        # Get all workflow sessions.
-        workflow_sessions = workflow.storage.get_all_sessions()
-        if not workflow_sessions:
-            st.sidebar.info("No saved sessions found.")
-            return
-
-        # Get session names if available, otherwise use IDs.
-        sessions_list = []
-        for session in workflow_sessions:
-            session_id = session.session_id
-            session_name = session.session_data.get("session_name", None) if session.session_data else None
-            display_name = session_name if session_name else session_id
-            sessions_list.append({"id": session_id, "display_name": display_name})
-
-        # Display session selector.
-        st.sidebar.markdown("#### 💬 Session")
-        selected_session = st.sidebar.selectbox(
-            "Session",
-            options=[s["display_name"] for s in sessions_list],
-            key="session_selector",
-            label_visibility="collapsed",
-        )
-
-        # Find the selected session ID.
-        selected_session_id = next(s["id"] for s in sessions_list if s["display_name"] == selected_session)
-        # Update the workflow session if it has changed.
-        if st.session_state[workflow_name]["session_id"] != selected_session_id:
-            logger.info(f"---*--- Loading {workflow_name} session: {selected_session_id} ---*---")
-            st.session_state[workflow_name]["workflow"] = get_workflow(
-                user_id=user_id,
-                model_id=model_id,
-                session_id=selected_session_id,
-            )
-            st.rerun()
+        _session_switcher(workflow_name, "workflow", workflow.storage, get_workflow, user_id, model_id)
     except Exception as e:
         logger.error(f"Error in session selector: {str(e)}")
         st.sidebar.error("Failed to load sessions")
 
 
+@st.fragment
+def _session_rename_widget(agent: Agent) -> None:
+    """Display the current session name with a button to rename it."""
+    container = st.container()
+    session_row = container.columns([3, 1], vertical_alignment="center")
+
+    # Initialize session_edit_mode if needed.
+    if "session_edit_mode" not in st.session_state:
+        st.session_state.session_edit_mode = False
+
+    # Show the session name.
+    with session_row[0]:
+        if st.session_state.session_edit_mode:
+            new_session_name = st.text_input(
+                "Session Name",
+                value=agent.session_name,
+                key="session_name_input",
+                label_visibility="collapsed",
+            )
+        else:
+            st.markdown(f"Session Name: **{agent.session_name}**")
+
+    # Show the rename session button.
+    with session_row[1]:
+        if st.session_state.session_edit_mode:
+            if st.button("✓", key="save_session_name", type="primary"):
+                if new_session_name:
+                    agent.rename_session(new_session_name)
+                    _load_sessions.clear(_storage_key(agent.storage), agent.storage)
+                    st.session_state.session_edit_mode = False
+                    container.success("Renamed!")
+                    # Trigger a full rerun to refresh the sessions list
+                    st.rerun()
+        else:
+            if st.button("✎", key="edit_session_name"):
+                st.session_state.session_edit_mode = True
+                st.rerun(scope="fragment")
+
+
 async def session_selector(agent_name: str, agent: Agent, get_agent: Callable, user_id: str, model_id: str) -> None:
     """Display a session selector in the sidebar, if a new session is selected, the agent is restarted with the new session."""
 
@@ -303,73 +501,13 @@ async def session_selector(agent_name: str, agent: Agent, get_agent: Callable, u
         return
 
     try:
-        # Get all agent sessions.
-        agent_sessions = agent.storage.get_all_sessions()
-        if not agent_sessions:
-            st.sidebar.info("No saved sessions found.")
+        if not _session_switcher(agent_name, "agent", agent.storage, get_agent, user_id, model_id):
             return
 
-        # Get session names if available, otherwise use IDs.
-        sessions_list = []
-        for session in agent_sessions:
-            session_id = session.session_id
-            session_name = session.session_data.get("session_name", None) if session.session_data else None
-            display_name = session_name if session_name else session_id
-            sessions_list.append({"id": session_id, "display_name": display_name})
-
-        # Display session selector.
-        st.sidebar.markdown("#### 💬 Session")
-        selected_session = st.sidebar.selectbox(
-            "Session",
-            options=[s["display_name"] for s in sessions_list],
-            key="session_selector",
-            label_visibility="collapsed",
-        )
-        # Find the selected session ID.
-        selected_session_id = next(s["id"] for s in sessions_list if s["display_name"] == selected_session)
-        # Update the agent session if it has changed.
-        if st.session_state[agent_name]["session_id"] != selected_session_id:
-            logger.info(f"---*--- Loading {agent_name} session: {selected_session_id} ---*---")
-            st.session_state[agent_name]["agent"] = get_agent(
-                user_id=user_id,
-                model_id=model_id,
-                session_id=selected_session_id,
-            )
-            st.rerun()
-
-        # Show the rename session widget.
-        container = st.sidebar.container()
-        session_row = container.columns([3, 1], vertical_alignment="center")
-
-        # Initialize session_edit_mode if needed.
-        if "session_edit_mode" not in st.session_state:
-            st.session_state.session_edit_mode = False
-
-        # Show the session name.
-        with session_row[0]:
-            if st.session_state.session_edit_mode:
-                new_session_name = st.text_input(
-                    "Session Name",
-                    value=agent.session_name,
-                    key="session_name_input",
-                    label_visibility="collapsed",
-                )
-            else:
-                st.markdown(f"Session Name: **{agent.session_name}**")
-
-        # Show the rename session button.
-        with session_row[1]:
-            if st.session_state.session_edit_mode:
-                if st.button("✓", key="save_session_name", type="primary"):
-                    if new_session_name:
-                        agent.rename_session(new_session_name)
-                        st.session_state.session_edit_mode = False
-                        container.success("Renamed!")
-                        # Trigger a rerun to refresh the sessions list
-                        st.rerun()
-            else:
-                if st.button("✎", key="edit_session_name"):
-                    st.session_state.session_edit_mode = True
+        # Show the rename session widget in its own fragment, so toggling edit mode
+        # doesn't rerun the whole page and the sessions list fetch.
+        with st.sidebar:
+            _session_rename_widget(agent)
     except Exception as e:
         logger.error(f"Error in session selector: {str(e)}")
         st.sidebar.error("Failed to load sessions")
@@ -381,34 +519,27 @@ def export_chat_history(agent_name: str):
     Returns:
         str: Formatted markdown string of the chat history
     """
-    if "messages" not in st.session_state[agent_name] or not st.session_state[agent_name]["messages"]:
+    messages = st.session_state[agent_name].get("messages")
+    if not messages:
         return f"# {agent_name} - Chat History\n\nNo messages to export."
 
-    chat_text = f"# {agent_name} - Chat History\n\n"
-    for msg in st.session_state[agent_name]["messages"]:
+    parts: List[str] = [f"# {agent_name} - Chat History\n\n"]
+    for msg in messages:
         role_label = "🤖 Assistant" if msg["role"] == "assistant" else "👤 User"
-        chat_text += f"### {role_label}\n{msg['content']}\n\n"
+        parts.append(f"### {role_label}\n{msg['content']}\n\n")
 
         # Include tool calls if present
         if msg.get("tool_calls"):
-            chat_text += "#### Tool Calls:\n"
+            parts.append("#### Tool Calls:\n")
             for i, tool_call in enumerate(msg["tool_calls"]):
-                if isinstance(tool_call, ToolExecution):
-                    tool_name = tool_call.tool_name
-                    chat_text += f"**{i + 1}. {tool_name}**\n\n"
-                    if tool_call.tool_args is not None:
-                        chat_text += f"Arguments: ```json\n{tool_call.tool_args}\n```\n\n"
-                    if tool_call.result is not None:
-                        chat_text += f"Results: ```\n{tool_call.result}\n```\n\n"
-                else:
-                    tool_name = tool_call.get("name", "Unknown Tool")
-                    chat_text += f"**{i + 1}. {tool_name}**\n\n"
-                    if "arguments" in tool_call:
-                        chat_text += f"Arguments: ```json\n{tool_call['arguments']}\n```\n\n"
-                    if "content" in tool_call:
-                        chat_text += f"Results: ```\n{tool_call['content']}\n```\n\n"
+                tool_name, tool_args, result, _ = _normalize_tool_call(tool_call)
+                parts.append(f"**{i + 1}. {tool_name}**\n\n")
+                if tool_args is not None:
+                    parts.append(f"Arguments: ```json\n{tool_args}\n```\n\n")
+                if result is not None:
+                    parts.append(f"Results: ```\n{result}\n```\n\n")
 
-    return chat_text
+    return "".join(parts)
 
 
 def export_team_chat_history(team_name: str):
@@ -417,65 +548,71 @@ def export_team_chat_history(team_name: str):
     Returns:
         str: Formatted markdown string of the team chat history
     """
-    if "messages" not in st.session_state[team_name] or not st.session_state[team_name]["messages"]:
-        return f"# {team_name} - Chat History\n\nNo messages to export."
+    # Team messages use the same structure as Agent messages
+    return export_chat_history(team_name)
 
-    chat_text = f"# {team_name} - Chat History\n\n"
-    for msg in st.session_state[team_name]["messages"]:
-        role_label = "🤖 Assistant" if msg["role"] == "assistant" else "👤 User"
-        chat_text += f"### {role_label}\n{msg['content']}\n\n"
 
-        # Include tool calls if present
-        if msg.get("tool_calls"):
-            chat_text += "#### Tool Calls:\n"
-            for i, tool_call in enumerate(msg["tool_calls"]):
-                if isinstance(tool_call, ToolExecution):
-                    tool_name = tool_call.tool_name
-                    chat_text += f"**{i + 1}. {tool_name}**\n\n"
-                    if tool_call.tool_args is not None:
-                        chat_text += f"Arguments: ```json\n{tool_call.tool_args}\n```\n\n"
-                    if tool_call.result is not None:
-                        chat_text += f"Results: ```\n{tool_call.result}\n```\n\n"
-                else:
-                    tool_name = tool_call.get("name", "Unknown Tool")
-                    chat_text += f"**{i + 1}. {tool_name}**\n\n"
-                    if "arguments" in tool_call:
-                        chat_text += f"Arguments: ```json\n{tool_call['arguments']}\n```\n\n"
-                    if "content" in tool_call:
-                        chat_text += f"Results: ```\n{tool_call['content']}\n```\n\n"
+def cached_chat_export(agent_name: str, export_fn: Callable[[str], str]) -> str:
+    """Return the chat export for an Agent, regenerating it only when the session or message count changes.
 
-    return chat_text
+    The export is memoized in the Agent's session state rather than st.cache_data so that
+    it is never shared between browser sessions.
+    """
+    agent_state = st.session_state[agent_name]
+    cache_key = (agent_state.get("session_id"), len(agent_state.get("messages") or []))
+    cached = agent_state.get("export_cache")
+    if cached is None or cached[0] != cache_key:
+        cached = (cache_key, export_fn(agent_name))
+        agent_state["export_cache"] = cached
+    return cached[1]
 
 
 async def utilities_widget(agent_name: str, agent: Agent) -> None:
     """Display a utilities widget in the sidebar."""
     st.sidebar.markdown("#### 🛠️ Utilities")
-    col1, col2 = st.sidebar.columns(2)
+    # Fragments can't write to st.sidebar directly, so render the fragment inside it
+    with st.sidebar:
+        _utilities_fragment(agent_name)
+
+
+@st.fragment
+def _utilities_fragment(agent_name: str) -> None:
+    """Render the utility buttons, interactions here only rerun this fragment."""
+    state = st.session_state[agent_name]
+    col1, col2 = st.columns(2)
     with col1:
         if st.button("🔄 Start New Chat"):
             restart_agent(agent_name)
     with col2:
         fn = f"{agent_name}_chat_history.md"
-        if "session_id" in st.session_state[agent_name]:
-            fn = f"{agent_name}_{st.session_state[agent_name]['session_id']}.md"
-        if st.download_button(
+        if "session_id" in state:
+            fn = f"{agent_name}_{state['session_id']}.md"
+        # Only build the export once the user asks for it
+        if not state.get("export_requested"):
+            if st.button(":file_folder: Prepare Export"):
+                state["export_requested"] = True
+                st.rerun(scope="fragment")
+        elif st.download_button(
             ":file_folder: Export Chat History",
-            export_chat_history(agent_name),
+            cached_chat_export(agent_name, export_chat_history),
             file_name=fn,
             mime="text/markdown",
         ):
-            st.sidebar.success("Chat history exported!")
+            state["export_requested"] = False
+            st.success("Chat history exported!")
 
 
 def restart_agent(agent_name: str):
     logger.debug("---*--- Restarting Agent ---*---")
-    st.session_state[agent_name]["agent"] = None
-    st.session_state[agent_name]["session_id"] = None
-    st.session_state[agent_name]["messages"] = []
-    if "url_scrape_key" in st.session_state[agent_name]:
-        st.session_state[agent_name]["url_scrape_key"] += 1
-    if "file_uploader_key" in st.session_state[agent_name]:
-        st.session_state[agent_name]["file_uploader_key"] += 1
+    state = st.session_state[agent_name]
+    state["agent"] = None
+    state["session_id"] = None
+    state["messages"] = []
+    state["export_requested"] = False
+    if "url_scrape_key" in state:
+        state["url_scrape_key"] += 1
+    if "file_uploader_key" in state:
+        state["file_uploader_key"] += 1
     st.rerun()
 
 
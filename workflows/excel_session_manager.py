@@ -1,39 +1,108 @@
+import json
 import os
+import threading
+import time
 import uuid
+from collections import OrderedDict, defaultdict, deque
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import Integer, bindparam, case, cast, exists, func, or_, select, update
 
-from db.session import get_db
+from db.init_db import init_database
+from db.session import session_scope
+from db.tables.excel_workflow_responses import ExcelWorkflowResponses
 from db.tables.excel_workflow_sessions import ExcelWorkflowSessions
 from agno.utils.log import logger
 
+# Number of buffered workflow responses that triggers a write to the database
+RESPONSE_FLUSH_SIZE = 20
+
+# Number of recent workflow responses per session kept in memory, older ones are read back from the database
+MAX_CACHED_RESPONSES = 500
+
+# Columns returned for a session, selected directly so reads skip ORM object hydration
+_SESSION_COLUMNS = (
+    ExcelWorkflowSessions.session_id,
+    ExcelWorkflowSessions.session_name,
+    ExcelWorkflowSessions.file_path,
+    ExcelWorkflowSessions.original_filename,
+    ExcelWorkflowSessions.niche,
+    ExcelWorkflowSessions.chunk_size,
+    ExcelWorkflowSessions.results_file_path,
+    ExcelWorkflowSessions.total_keywords,
+    ExcelWorkflowSessions.status,
+    ExcelWorkflowSessions.user_id,
+    ExcelWorkflowSessions.model_id,
+    ExcelWorkflowSessions.is_active,
+    ExcelWorkflowSessions.created_at,
+    ExcelWorkflowSessions.updated_at,
+    ExcelWorkflowSessions.completed_at,
+)
+
+# Lookup statements built once at import, values are bound per call
+_GET_ACTIVE_BY_ID_STMT = select(*_SESSION_COLUMNS).where(
+    ExcelWorkflowSessions.session_id == bindparam("session_id"),
+    ExcelWorkflowSessions.is_active.is_(True)
+)
+_GET_ACTIVE_BY_NAME_STMT = select(*_SESSION_COLUMNS).where(
+    ExcelWorkflowSessions.session_name == bindparam("session_name"),
+    ExcelWorkflowSessions.is_active.is_(True)
+)
+
+# Database tables are checked once per process rather than by every manager
+_DB_INITIALIZED = False
+_DB_INIT_LOCK = threading.Lock()
+
 
 class ExcelSessionManager:
     """Manager for Excel workflow sessions with database persistence."""
+
+    # Maximum number of active sessions kept in the lookup cache
+    _CACHE_MAX = 256
+    # Seconds a cached session is trusted. Writes from this process invalidate it right away, but the
+    # API process updates status, results and enhanced data of the same sessions too.
+    _CACHE_TTL = 5.0
+    # Managers are created per operation, so the lookup cache is shared by all instances.
+    # Sessions are stored as (cached_at, session_data) with cached_at from time.monotonic().
+    _cache_lock = threading.Lock()
+    _cache_by_id: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+    _cache_name_to_id: Dict[str, str] = {}
     
     def __init__(self):
         # Initialize database tables first
         self._init_database()
-        self.db_session = next(get_db())
+        # Most recent responses stored by this manager, keyed by session ID
+        self._workflow_responses: Dict[str, deque] = defaultdict(lambda: deque(maxlen=MAX_CACHED_RESPONSES))
+        # Sessions whose whole response history went through this manager (created or cleared here),
+        # the only ones for which _workflow_responses can be complete
+        self._sessions_started_here: set = set()
+        # Responses not yet written to the database
+        self._pending_responses: List[Dict[str, Any]] = []
     
     def _init_database(self):
-        """Initialize database tables if they don't exist."""
-        try:
-            from db.init_db import init_database
-            init_database()
-        except Exception as e:
-            logger.warning(f"Database initialization failed: {e}")
-            # Continue without failing the session manager initialization
-    
-    def __del__(self):
-        """Close database session when manager is destroyed."""
-        if hasattr(self, 'db_session') and self.db_session:
+        """Initialize database tables if they don't exist, once per process."""
+        global _DB_INITIALIZED
+        if _DB_INITIALIZED:
+            return
+        with _DB_INIT_LOCK:
+            if _DB_INITIALIZED:
+                return
             try:
-                self.db_session.close()
-            except Exception:
-                pass  # Ignore errors during cleanup
+                _DB_INITIALIZED = init_database()
+            except Exception as e:
+                logger.warning(f"Database initialization failed: {e}")
+                # Continue without failing the session manager initialization
+    
+    def close(self) -> None:
+        """Persist any buffered workflow responses; database sessions are already closed per operation."""
+        self.flush_responses()
+
+    def __enter__(self) -> "ExcelSessionManager":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
     
     def create_session(
         self,
@@ -58,11 +127,11 @@ class ExcelSessionManager:
             model_id: Optional model ID used for processing
             
         Returns:
-            str: Session ID (UUID)
+            str: Session ID (UUID hex)
         """
         try:
             # Generate a unique session ID
-            session_id = str(uuid.uuid4())
+            session_id = uuid.uuid4().hex
             
             # Create session record
             session_record = ExcelWorkflowSessions(
@@ -78,17 +147,16 @@ class ExcelSessionManager:
                 is_active=True
             )
             
-            self.db_session.add(session_record)
-            self.db_session.commit()
+            with session_scope() as db:
+                db.add(session_record)
+                db.commit()
+            self._invalidate_cached_session(session_id)
+            self._sessions_started_here.add(session_id)
             
             logger.info(f"Created Excel session: {session_id} with name: {session_name}")
             return session_id
             
         except Exception as e:
-            try:
-                self.db_session.rollback()
-            except Exception:
-                pass  # Ignore rollback errors
             logger.error(f"Error creating Excel session: {e}")
             raise
     
@@ -102,16 +170,24 @@ class ExcelSessionManager:
         Returns:
             Dict with session data or None if not found
         """
+        with self._cache_lock:
+            session_id = self._cache_name_to_id.get(session_name)
+        if session_id is not None:
+            cached = self._get_cached_session(session_id)
+            # The name may have changed since it was mapped to this session
+            if cached is not None and cached["session_name"] == session_name:
+                return cached
+
         try:
-            session_record = self.db_session.query(ExcelWorkflowSessions).filter(
-                and_(
-                    ExcelWorkflowSessions.session_name == session_name,
-                    ExcelWorkflowSessions.is_active == True
-                )
-            ).first()
-            
-            if session_record:
-                return self._session_record_to_dict(session_record)
+            with session_scope() as db:
+                session_row = db.execute(
+                    _GET_ACTIVE_BY_NAME_STMT, {"session_name": session_name}
+                ).mappings().first()
+            
+            if session_row:
+                session_data = dict(session_row)
+                self._cache_session(session_data)
+                return session_data
             return None
             
         except Exception as e:
@@ -128,16 +204,20 @@ class ExcelSessionManager:
         Returns:
             Dict with session data or None if not found
         """
+        cached = self._get_cached_session(session_id)
+        if cached is not None:
+            return cached
+
         try:
-            session_record = self.db_session.query(ExcelWorkflowSessions).filter(
-                and_(
-                    ExcelWorkflowSessions.session_id == session_id,
-                    ExcelWorkflowSessions.is_active == True
-                )
-            ).first()
-            
-            if session_record:
-                return self._session_record_to_dict(session_record)
+            with session_scope() as db:
+                session_row = db.execute(
+                    _GET_ACTIVE_BY_ID_STMT, {"session_id": session_id}
+                ).mappings().first()
+            
+            if session_row:
+                session_data = dict(session_row)
+                self._cache_session(session_data)
+                return session_data
             return None
             
         except Exception as e:
@@ -166,55 +246,106 @@ class ExcelSessionManager:
             bool: True if update was successful
         """
         try:
-            session_record = self.db_session.query(ExcelWorkflowSessions).filter(
-                ExcelWorkflowSessions.session_id == session_id
-            ).first()
-            
-            if not session_record:
-                logger.warning(f"Session not found for update: {session_id}")
-                return False
-            
-            session_record.status = status
-            session_record.updated_at = datetime.utcnow()
+            # updated_at is set by the column's onupdate=func.now()
+            values: Dict[str, Any] = {"status": status}
             
             if results_file_path:
-                session_record.results_file_path = results_file_path
+                values["results_file_path"] = results_file_path
             
             if total_keywords is not None:
-                session_record.total_keywords = total_keywords
+                values["total_keywords"] = total_keywords
             
             if status == "completed":
-                session_record.completed_at = datetime.utcnow()
+                values["completed_at"] = func.now()
             
-            # Store enhanced data if provided
+            # Store enhanced data if provided, as JSON so every worker can read it back
             if enhanced_data is not None:
-                # For now, we'll store it as a JSON string in a comment field
-                # In a future version, we could add a dedicated column for this
-                import json
                 try:
-                    enhanced_json = json.dumps(enhanced_data)
-                    # Store in a way that doesn't break existing functionality
-                    # For now, we'll log it and could extend the database schema later
-                    logger.info(f"Enhanced data for session {session_id}: {enhanced_json[:200]}...")
+                    values["enhanced_data"] = json.dumps(enhanced_data)
                 except Exception as e:
                     logger.warning(f"Could not serialize enhanced data: {e}")
             
-            self.db_session.commit()
+            # Single UPDATE instead of loading the row first; the session holds no loaded rows to synchronize
+            with session_scope() as db:
+                result = db.execute(
+                    update(ExcelWorkflowSessions)
+                    .where(ExcelWorkflowSessions.session_id == session_id)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+            
+            if result.rowcount == 0:
+                logger.warning(f"Session not found for update: {session_id}")
+                return False
+            
+            self._invalidate_cached_session(session_id)
             logger.info(f"Updated session {session_id} status to {status}")
             return True
             
         except Exception as e:
-            try:
-                self.db_session.rollback()
-            except Exception:
-                pass  # Ignore rollback errors
             logger.error(f"Error updating session {session_id}: {e}")
             return False
 
+    def get_enhanced_data(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the enhanced data stored for a session by update_session_status.
+        
+        Args:
+            session_id: The session ID to look up
+            
+        Returns:
+            The enhanced data, or None if the session has none
+        """
+        try:
+            with session_scope() as db:
+                enhanced_json = db.execute(
+                    select(ExcelWorkflowSessions.enhanced_data).where(
+                        ExcelWorkflowSessions.session_id == session_id
+                    )
+                ).scalar_one_or_none()
+            
+            return json.loads(enhanced_json) if enhanced_json else None
+            
+        except Exception as e:
+            logger.error(f"Error getting enhanced data for session '{session_id}': {e}")
+            return None
+
+    def create_sessions_bulk(self, records: List[Dict[str, Any]]) -> List[str]:
+        """
+        Create several Excel workflow sessions with a single INSERT and commit.
+        
+        Args:
+            records: Session fields as accepted by create_session, one dict per session
+            
+        Returns:
+            List of session IDs, in the same order as records
+        """
+        try:
+            rows = [
+                {"status": "pending", "is_active": True, **record, "session_id": uuid.uuid4().hex}
+                for record in records
+            ]
+            with session_scope() as db:
+                db.bulk_insert_mappings(ExcelWorkflowSessions, rows)
+                db.commit()
+            
+            session_ids = [row["session_id"] for row in rows]
+            self._sessions_started_here.update(session_ids)
+            logger.info(f"Created {len(rows)} Excel sessions")
+            return session_ids
+            
+        except Exception as e:
+            logger.error(f"Error creating Excel sessions: {e}")
+            raise
+
     def store_workflow_response(self, session_id: str, response_content: str, response_type: str = "assistant") -> bool:
         """
         Store workflow response in session for conversation history.
         
+        Responses are buffered and written to the database in batches, call
+        flush_responses once the workflow run is over to persist the remainder.
+        
         Args:
             session_id: The session ID to store response for
             response_content: The content of the response
@@ -224,18 +355,20 @@ class ExcelSessionManager:
             bool: True if storage was successful
         """
         try:
-            # Store in session cache for now (could be extended to database later)
-            if not hasattr(self, '_workflow_responses'):
-                self._workflow_responses = {}
-            
-            if session_id not in self._workflow_responses:
-                self._workflow_responses[session_id] = []
-            
+            created_at = datetime.utcnow()
             self._workflow_responses[session_id].append({
                 'type': response_type,
                 'content': response_content,
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': created_at.isoformat()
+            })
+            self._pending_responses.append({
+                'session_id': session_id,
+                'response_type': response_type,
+                'content': response_content,
+                'created_at': created_at
             })
+            if len(self._pending_responses) >= RESPONSE_FLUSH_SIZE:
+                self.flush_responses()
             
             logger.info(f"Stored workflow response for session {session_id}")
             return True
@@ -244,6 +377,27 @@ class ExcelSessionManager:
             logger.error(f"Error storing workflow response for session {session_id}: {e}")
             return False
 
+    def flush_responses(self) -> bool:
+        """
+        Write buffered workflow responses to the database with a single bulk INSERT.
+        
+        Returns:
+            bool: True if the buffer was written (or empty)
+        """
+        if not self._pending_responses:
+            return True
+        try:
+            with session_scope() as db:
+                db.bulk_insert_mappings(ExcelWorkflowResponses, self._pending_responses)
+                db.commit()
+            logger.info(f"Persisted {len(self._pending_responses)} workflow responses")
+            self._pending_responses = []
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error persisting workflow responses: {e}")
+            return False
+
     def get_workflow_responses(self, session_id: str) -> List[Dict[str, Any]]:
         """
         Get workflow responses for a session.
@@ -255,9 +409,26 @@ class ExcelSessionManager:
             List of response dictionaries
         """
         try:
-            if hasattr(self, '_workflow_responses') and session_id in self._workflow_responses:
-                return self._workflow_responses[session_id]
-            return []
+            # Only a session started here has its whole history in memory, and only until responses are evicted
+            if session_id in self._sessions_started_here:
+                cached_responses = self._workflow_responses.get(session_id, ())
+                if len(cached_responses) < MAX_CACHED_RESPONSES:
+                    return list(cached_responses)
+            
+            # Started elsewhere or older responses were evicted, load the persisted history
+            self.flush_responses()
+            with session_scope() as db:
+                rows = db.query(
+                    ExcelWorkflowResponses.response_type,
+                    ExcelWorkflowResponses.content,
+                    ExcelWorkflowResponses.created_at,
+                ).filter(
+                    ExcelWorkflowResponses.session_id == session_id
+                ).order_by(ExcelWorkflowResponses.id).all()
+            return [
+                {'type': response_type, 'content': content, 'timestamp': created_at.isoformat()}
+                for response_type, content, created_at in rows
+            ]
             
         except Exception as e:
             logger.error(f"Error getting workflow responses for session {session_id}: {e}")
@@ -274,9 +445,16 @@ class ExcelSessionManager:
             bool: True if clearing was successful
         """
         try:
-            if hasattr(self, '_workflow_responses') and session_id in self._workflow_responses:
-                del self._workflow_responses[session_id]
-                logger.info(f"Cleared workflow responses for session {session_id}")
+            self._workflow_responses.pop(session_id, None)
+            self._pending_responses = [r for r in self._pending_responses if r['session_id'] != session_id]
+            with session_scope() as db:
+                db.query(ExcelWorkflowResponses).filter(
+                    ExcelWorkflowResponses.session_id == session_id
+                ).delete(synchronize_session=False)
+                db.commit()
+            # The history now starts empty, so later responses stored here are all of it
+            self._sessions_started_here.add(session_id)
+            logger.info(f"Cleared workflow responses for session {session_id}")
             return True
             
         except Exception as e:
@@ -286,31 +464,39 @@ class ExcelSessionManager:
     def list_user_sessions(
         self,
         user_id: Optional[str] = None,
-        limit: int = 50
+        limit: int = 50,
+        before: Optional[datetime] = None
     ) -> List[Dict[str, Any]]:
         """
-        List sessions for a user.
+        List sessions for a user, newest first.
         
         Args:
             user_id: Optional user ID to filter by
             limit: Maximum number of sessions to return
+            before: Optional cursor, only sessions created before it are returned.
+                Pass the created_at of the last session of a page to get the next page.
             
         Returns:
             List of session dictionaries
         """
         try:
-            query = self.db_session.query(ExcelWorkflowSessions).filter(
-                ExcelWorkflowSessions.is_active == True
+            stmt = select(*_SESSION_COLUMNS).where(
+                ExcelWorkflowSessions.is_active.is_(True)
             )
             
             if user_id:
-                query = query.filter(ExcelWorkflowSessions.user_id == user_id)
+                stmt = stmt.where(ExcelWorkflowSessions.user_id == user_id)
             
-            sessions = query.order_by(
+            # Keyset pagination: a range scan on the created_at indexes instead of an OFFSET
+            if before is not None:
+                stmt = stmt.where(ExcelWorkflowSessions.created_at < before)
+            
+            stmt = stmt.order_by(
                 ExcelWorkflowSessions.created_at.desc()
-            ).limit(limit).all()
+            ).limit(limit)
             
-            return [self._session_record_to_dict(session) for session in sessions]
+            with session_scope() as db:
+                return [dict(row) for row in db.execute(stmt).mappings()]
             
         except Exception as e:
             logger.error(f"Error listing sessions for user {user_id}: {e}")
@@ -327,49 +513,62 @@ class ExcelSessionManager:
             bool: True if deletion was successful
         """
         try:
-            session_record = self.db_session.query(ExcelWorkflowSessions).filter(
-                ExcelWorkflowSessions.session_id == session_id
-            ).first()
+            with session_scope() as db:
+                result = db.execute(
+                    update(ExcelWorkflowSessions)
+                    .where(ExcelWorkflowSessions.session_id == session_id)
+                    .values(is_active=False)
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
             
-            if not session_record:
+            if result.rowcount == 0:
                 logger.warning(f"Session not found for deletion: {session_id}")
                 return False
             
-            session_record.is_active = False
-            session_record.updated_at = datetime.utcnow()
-            
-            self.db_session.commit()
+            self._invalidate_cached_session(session_id)
             logger.info(f"Deleted session: {session_id}")
             return True
             
         except Exception as e:
-            try:
-                self.db_session.rollback()
-            except Exception:
-                pass  # Ignore rollback errors
             logger.error(f"Error deleting session {session_id}: {e}")
             return False
     
-    def _session_record_to_dict(self, session_record: ExcelWorkflowSessions) -> Dict[str, Any]:
-        """Convert session record to dictionary."""
-        return {
-            'session_id': session_record.session_id,
-            'session_name': session_record.session_name,
-            'file_path': session_record.file_path,
-            'original_filename': session_record.original_filename,
-            'niche': session_record.niche,
-            'chunk_size': session_record.chunk_size,
-            'results_file_path': session_record.results_file_path,
-            'total_keywords': session_record.total_keywords,
-            'status': session_record.status,
-            'user_id': session_record.user_id,
-            'model_id': session_record.model_id,
-            'is_active': session_record.is_active,
-            'created_at': session_record.created_at,
-            'updated_at': session_record.updated_at,
-            'completed_at': session_record.completed_at
-        }
-    
+    @classmethod
+    def _get_cached_session(cls, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached session that hasn't expired, marking it as most recently used."""
+        with cls._cache_lock:
+            entry = cls._cache_by_id.get(session_id)
+            if entry is None:
+                return None
+            cached_at, session_data = entry
+            if time.monotonic() - cached_at >= cls._CACHE_TTL:
+                del cls._cache_by_id[session_id]
+                cls._cache_name_to_id.pop(session_data["session_name"], None)
+                return None
+            cls._cache_by_id.move_to_end(session_id)
+            return dict(session_data)
+
+    @classmethod
+    def _cache_session(cls, session_data: Dict[str, Any]) -> None:
+        """Add a session to the lookup cache, evicting the least recently used ones."""
+        with cls._cache_lock:
+            session_id = session_data["session_id"]
+            cls._cache_by_id[session_id] = (time.monotonic(), dict(session_data))
+            cls._cache_by_id.move_to_end(session_id)
+            cls._cache_name_to_id[session_data["session_name"]] = session_id
+            while len(cls._cache_by_id) > cls._CACHE_MAX:
+                _, (_, evicted) = cls._cache_by_id.popitem(last=False)
+                cls._cache_name_to_id.pop(evicted["session_name"], None)
+
+    @classmethod
+    def _invalidate_cached_session(cls, session_id: str) -> None:
+        """Drop a session from the lookup cache after it was written."""
+        with cls._cache_lock:
+            entry = cls._cache_by_id.pop(session_id, None)
+            if entry is not None:
+                cls._cache_name_to_id.pop(entry[1]["session_name"], None)
+
     def generate_session_name(self, original_filename: str, niche: str) -> str:
         """
         Generate a user-friendly session name.
@@ -390,11 +589,26 @@ class ExcelSessionManager:
         # Generate session name
         session_name = f"{base_name} - {niche} - {timestamp}"
         
-        # Ensure uniqueness
-        counter = 1
-        original_name = session_name
-        while self.get_session_by_name(session_name) is not None:
-            session_name = f"{original_name} ({counter})"
-            counter += 1
+        # Ensure uniqueness by asking the database for the highest " (N)" suffix already taken.
+        # Inactive sessions are included because session_name is unique across all rows.
+        # The bare name counts as suffix 0; SQLite's CAST reads the leading digits of "N)".
+        suffix = case(
+            (ExcelWorkflowSessions.session_name == session_name, 0),
+            else_=cast(func.substr(ExcelWorkflowSessions.session_name, len(session_name) + 3), Integer),
+        )
+        with session_scope() as db:
+            # Names carry a timestamp so collisions are rare; the unique index answers this without reading a row
+            if not db.execute(
+                select(exists().where(ExcelWorkflowSessions.session_name == session_name))
+            ).scalar():
+                return session_name
+            highest_suffix = db.execute(
+                select(func.max(suffix)).where(
+                    or_(
+                        ExcelWorkflowSessions.session_name == session_name,
+                        ExcelWorkflowSessions.session_name.startswith(f"{session_name} (", autoescape=True),
+                    )
+                )
+            ).scalar()
         
-        return session_name
+        return f"{session_name} ({highest_suffix + 1})"
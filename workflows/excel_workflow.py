@@ -1,7 +1,17 @@
 import base64
+import binascii
+import functools
+import io
+import itertools
+import json
 import pandas as pd
 import os
-from typing import List, Optional, Dict, Iterator, Any
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import BinaryIO, ClassVar, List, Optional, Dict, Iterator, Any, Union
 from textwrap import dedent
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
@@ -12,222 +22,419 @@ from agno.utils.log import logger
 from workflows.settings_manager import WorkflowSettingsManager
 from workflows.excel_session_manager import ExcelSessionManager
 
-current_row_position = 0
-
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+# Opened CATEGORY sheets keyed by (absolute path, mtime), so chunked reads open the workbook only once
+_WORKBOOK_CACHE: Dict[tuple, "_CategorySheet"] = {}
+# Number of opened workbooks kept in memory
+_WORKBOOK_CACHE_SIZE = 4
+# Number of sessions whose results and enhanced data are kept in the workflow's session_state
+MAX_CACHED_SESSIONS = 256
+# Number of chunks sent to the keyword analyzer at the same time
+ANALYSIS_CONCURRENCY = 4
+# Cell values that don't count as keywords; missing cells read as 'nan' from object columns and '<NA>' from Arrow string columns
+_SKIP_KEYWORDS = frozenset({'', 'nan', 'none', '<na>'})
+# Replaces characters that would break a markdown table cell
+_TABLE_CELL_TRANSLATION = str.maketrans({'\n': ' ', '|': ' '})
+# Simple intent detection for the summary insights, checked in order; keywords matching none are general
+_KEYWORD_INTENT_PATTERNS = (
+    ('question_keywords', re.compile(r'how|what|why|when|where')),
+    ('comparison_keywords', re.compile(r'best|top|review|compare')),
+    ('benefit_keywords', re.compile(r'benefits|advantages|pros|effects')),
+    ('how_to_keywords', re.compile(r'recipe|how to|tutorial|guide')),
+)
+# Header names that mark the keyword and category columns of a sheet
+_KEYWORD_COLUMN_RE = re.compile(r'keyword|term|phrase|word', re.IGNORECASE)
+_CATEGORY_COLUMN_RE = re.compile(r'category|type|class|group', re.IGNORECASE)
+# Leading bytes of xlsx (zip), xls (OLE2) and BIFF files
+_EXCEL_SIGNATURES = (b'\x50\x4B\x03\x04', b'\xD0\xCF\x11\xE0', b'\x09\x08\x10\x00')
+
+
+# Default keyword analyzer instructions, "{niche}" is replaced with the run's niche
+_DEFAULT_INSTRUCTIONS = dedent("""\
+            You are a Seasoned SEO professional specializing in keyword analysis, At the same time you are an expert content creator (these previous two personalities should work in harmony and compatibility), Your task is objectively evaluating keywords for optimal SEO segments, and given complete keyword lists. Choose Keywords that are valuable and useful to readers., as these selected keywords will be used to create informative blog articles.
 
-def read_excel_chunk_with_calamine(filename: str, chunk_size: int = 100, reset_position: bool = False) -> tuple[
-    pd.DataFrame, int, int]:
-    """
-    Read Excel file using CalamineWorkbook and return a chunk of rows from the CATEGORY sheet
 
-    Args:
-        filename (str): Path to Excel file
-        chunk_size (int): Number of rows to read per chunk (default: 100)
-        reset_position (bool): Whether to reset the global position counter (default: False)
+Ensure that all evaluations are made solely based on the provided criteria without introducing any personal opinions or assumptions.
+________________________________________________________________
+**The inputs you will get:**
+- Keywords: insert keywords
+- Category of each keyword: category ( these categories are beneath the given niche.
+NICHE IS {niche} FOR ALL KEYWORDS
+________________________________________________________________
+First: analyze the keywords carefully to understand its context and its intent ( informational - commercial - Navigational - Transactional ), to determine the target audience whether it is (beginners OR intermediates OR experts) for the keywords.
+________________________________________________________________
+**Now,follow the following criteria to choose the valuable keywords:**
+1-Give all Keywords the same level of attention.
+*Note:Keywords can be a sentence, a command, or a question. Never base your analysis on this.*
 
-    Returns:
-        tuple: (DataFrame chunk, start_row, end_row)
-    """
-    global current_row_position
+2-As You are a SEO expert, Consider multiple perspectives before applying the criteria to choose valuable Keywords and then apply the following criteria in order to choose the valuable Keywords:
+- Keywords must be grammatically and linguistically correct.
+- Valuable Keywords provide deep information yet remain accessible to non-specialists.
+-Valuable Keywords offer practical solutions or scientific benefits.
+- A valuable Keyword is one that can be understood independently, even if presented alone.
 
-    if reset_position:
-        current_row_position = 0
 
-    try:
-        try:
-            from python_calamine import CalamineWorkbook
-            workbook = CalamineWorkbook.from_path(filename)
 
-            sheet_names = workbook.sheet_names
-            print(f"Available sheets: {sheet_names}")
+3- Also, as you are a content creator,review each keyword to make sure that:
+-Is it scalable for in-depth content?
+-Does it provide real solutions to the user?
+-Does it maintain clarity and coherence in isolation?
+-Does it provide useful information rather than superficial information?
+- Is it just an informational intention?
 
-            if "CATEGORY" not in sheet_names:
-                print("CATEGORY sheet not found, trying first available sheet...")
-                sheet_name = sheet_names[0] if sheet_names else "Sheet1"
-            else:
-                sheet_name = "CATEGORY"
+4-After that, Cross-reference the keyword against established industry guidelines and case studies to ensure that its value is consistent across various expert perspectives ( SEO expert and content creators ).
 
-            sheet_data = workbook.get_sheet_by_name(sheet_name).to_python()
+5-whether category is (beginners OR intermediates OR experts),You should Exclude any keyword that requires a level above the intermediates level to understand.
+________________________________________________________________
+**Important instructions and considerations:**
+1. Do not include personal opinions regarding the audience 's interests, desires, or perspectives.
+Also "Avoid over‐elaboration or speculative reasoning: focus only on the given criteria without philosophical digressions."
+2. Maintain a professional and objective tone throughout the analysis.
+3. Strictly follow the provided standards without deviation.
+4. Do not make assumptions about a keyword's depth or complexity; treat all keywords equally without any bias to any each.
+5. Do not add any extra emphasis or formatting to the keywords.
+7. Disregard search volume when evaluating keywords.
+8. Ensure that excluded keywords are only listed in the second table, not in the first.
+9. Ensure every keyword is evaluated and appears in one of the two tables (none are neglected).
+10. Scientific abbreviations are acceptable in both upper and lower case.
+11. Keywords that are trivially simple and cannot support in-depth content should be excluded, but if a straightforward keyword can still yield robust, beneficial content, keep it.
+12. If two keywords are ≥ 80 % similar, keep the clearer phrasing and the other similar in the excluded table.
+12. Exclude any non-English keywords.
+________________________________________________________________
+**Remember that the two personas ( the SEO expert and expert content creator ), must work in integration and harmony, without any distractions, contradictions, or objections.**
+________________________________________________________________
+**The outputs must be as following:**
+1. Provide a detailed and accurate statement of target audience analysis, audience level of experience or understanding, and any other relevant characteristics.
 
-            if sheet_data:
-                headers = sheet_data[0]
-                data = sheet_data[1:]
-                df = pd.DataFrame(data, columns=headers)
-            else:
-                df = pd.DataFrame()
+2.Table 1 consists of 2 columns (the Valuable Keyword | the reason ).
 
-        except ImportError:
-            print("CalamineWorkbook not available, trying pandas with calamine engine...")
-            try:
-                df = pd.read_excel(filename, engine='calamine', sheet_name="CATEGORY")
-            except:
-                print("Calamine engine failed, trying default engine...")
-                df = pd.read_excel(filename, sheet_name="CATEGORY")
-        except Exception as e:
-            print(f"CalamineWorkbook failed: {e}, trying pandas with calamine engine...")
-            try:
-                df = pd.read_excel(filename, engine='calamine', sheet_name="CATEGORY")
-            except:
-                print("Calamine engine failed, trying default engine...")
-                df = pd.read_excel(filename, sheet_name="CATEGORY")
 
-        total_rows = len(df)
+Ensure that the target audience is clearly indicated and justified based on the complexity and content of the keywords.
+________________________________________________________________
+**Several lists of keywords will be provided in the same chat, so you are required to deal with each list completely independently to avoid confusion or merging or comparing between the lists.**
+________________________________________________________________
+The instructions are finished, so after analyzing and understanding them well and in a coherent manner, ask for the inputs.
+""")
 
-        if current_row_position >= total_rows:
-            print("Reached end of file")
-            return pd.DataFrame(), current_row_position, total_rows
 
-        end_row = min(current_row_position + chunk_size, total_rows)
+class _CategorySheet:
+    """
+    The CATEGORY sheet of an Excel file, read a chunk at a time.
 
-        chunk_df = df.iloc[current_row_position:end_row].copy()
+    With python-calamine the cell data stays in calamine and rows are only converted to Python
+    objects as chunks are read, with sequential reads continuing from the previous one. Otherwise
+    the sheet is loaded with pandas and chunks are slices of it.
+    """
 
-        start_row = current_row_position
-        current_row_position = end_row
+    def __init__(self, source: Union[str, BinaryIO]):
+        self._lock = threading.Lock()
+        self._sheet = None
+        self._rows: Optional[Iterator[list]] = None
+        self._next_row = 0
+        self._df: Optional[pd.DataFrame] = None
+        if CalamineWorkbook is not None:
+            try:
+                self._open_with_calamine(source)
+                return
+            except Exception as e:
+                logger.warning(f"CalamineWorkbook failed: {e}, falling back to pandas...")
+                if not isinstance(source, str):
+                    source.seek(0)
+        self._load_with_pandas(source)
+
+    def _open_with_calamine(self, source: Union[str, BinaryIO]) -> None:
+        """Open the sheet with python-calamine, leaving the rows in calamine until they're read."""
+        if isinstance(source, str):
+            workbook = CalamineWorkbook.from_path(source)
+        else:
+            workbook = CalamineWorkbook.from_filelike(source)
+
+        sheet_names = workbook.sheet_names
+        logger.debug("Available sheets: %s", sheet_names)
+
+        if "CATEGORY" not in sheet_names:
+            logger.debug("CATEGORY sheet not found, using first available sheet")
+            sheet_name = sheet_names[0] if sheet_names else "Sheet1"
+        else:
+            sheet_name = "CATEGORY"
+
+        self._sheet = workbook.get_sheet_by_name(sheet_name)
+        self._rows = self._iter_sheet_rows()
+        # First row holds the headers
+        self.columns: List[Any] = next(self._rows, [])
+        self.total_rows: int = max(self._sheet.height - 1, 0)
+
+    def _iter_sheet_rows(self) -> Iterator[List[Any]]:
+        """
+        Iterate the rows of the sheet's used range, starting with the header row.
 
-        print(f"Read chunk: rows {start_row + 1} to {end_row} (chunk size: {len(chunk_df)})")
+        iter_rows also yields the blank rows above the used range, which to_python and height skip,
+        so those are dropped to keep the header, height and data rows in agreement.
+        """
+        rows = self._sheet.iter_rows()
+        start = self._sheet.start
+        if start:
+            rows = itertools.islice(rows, start[0], None)
+        return rows
+
+    def _load_with_pandas(self, source: Union[str, BinaryIO]) -> None:
+        """Load the keyword and category columns of the sheet with pandas."""
+        # Read the headers first so only the columns the workflow uses are loaded and kept in the cache
+        header = self._read_excel(source, nrows=0)
+        self.columns = list(header.columns)
+        if not self.columns:
+            self._df = header
+            self.total_rows = 0
+            return
+
+        keyword_column, category_column = _detect_keyword_columns(tuple(self.columns))
+        if keyword_column is None:
+            keyword_column = self.columns[0]
+        # The fallback keyword column may also be the category column
+        usecols = list(dict.fromkeys(col for col in (keyword_column, category_column) if col is not None))
+
+        self._df = _compact_keyword_columns(self._read_excel(source, usecols=usecols))
+        self.total_rows = len(self._df)
+
+    @staticmethod
+    def _read_excel(source: Union[str, BinaryIO], **kwargs) -> pd.DataFrame:
+        """Read the CATEGORY sheet with pandas, using its calamine engine when python-calamine is installed."""
+        if CalamineWorkbook is not None:
+            try:
+                return pd.read_excel(source, engine='calamine', sheet_name="CATEGORY", **kwargs)
+            except Exception:
+                logger.warning("Calamine engine failed, trying default engine...")
+            finally:
+                if not isinstance(source, str):
+                    source.seek(0)
+        try:
+            return pd.read_excel(source, sheet_name="CATEGORY", **kwargs)
+        finally:
+            if not isinstance(source, str):
+                source.seek(0)
 
-        return chunk_df, start_row, end_row
+    def read(self, start: int, end: int) -> pd.DataFrame:
+        """
+        Read the data rows in [start, end) as a DataFrame.
 
-    except Exception as e:
-        print(f"Error reading Excel file: {str(e)}")
-        try:
-            print("Trying fallback to default pandas engine...")
-            df = pd.read_excel(filename, sheet_name="CATEGORY")
+        Args:
+            start (int): First data row (0 is the row after the headers)
+            end (int): Row after the last one to read
 
-            total_rows = len(df)
-            print(f"Total rows in CATEGORY sheet: {total_rows}")
+        Returns:
+            pd.DataFrame: The rows, must not be modified as it may be a view of a cached sheet
+        """
+        if self._df is not None:
+            return self._df.iloc[start:end]
+        with self._lock:
+            if start < self._next_row:
+                # Going backwards, restart the row iterator after the header row
+                self._rows = self._iter_sheet_rows()
+                next(self._rows, None)
+                self._next_row = 0
+            rows = list(itertools.islice(self._rows, start - self._next_row, end - self._next_row))
+            self._next_row = start + len(rows)
+        return pd.DataFrame(rows, columns=self.columns)
+
+
+def _compact_keyword_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Store the keyword column of a sheet as Arrow-backed strings and its category column as a pandas Categorical.
 
-            if current_row_position >= total_rows:
-                print("Reached end of file")
-                return pd.DataFrame(), current_row_position, total_rows
+    Arrow keeps the keywords in one contiguous buffer instead of a Python object per cell, and the few
+    distinct categories are stored once with integer codes per row, which matters for the whole-sheet
+    DataFrame kept in the workbook cache. Without pyarrow the keyword column is left as it is.
 
-            end_row = min(current_row_position + chunk_size, total_rows)
-            chunk_df = df.iloc[current_row_position:end_row].copy()
+    Args:
+        df (pd.DataFrame): The loaded sheet
 
-            start_row = current_row_position
-            current_row_position = end_row
+    Returns:
+        pd.DataFrame: The sheet with its keyword and category columns converted
+    """
+    if df.columns.empty:
+        return df
+    keyword_column, category_column = _detect_keyword_columns(tuple(df.columns))
+    if category_column is not None:
+        df = df.astype({category_column: "category"})
+    if keyword_column is None:
+        keyword_column = df.columns[0]
+        # A numeric fallback column (e.g. row numbers) holds no keywords; keep its dtype so
+        # _chunk_keywords can still recognize and skip it
+        if pd.api.types.is_numeric_dtype(df[keyword_column]):
+            return df
+    try:
+        return df.astype({keyword_column: "string[pyarrow]"})
+    except ImportError:
+        return df
 
-            print(f"Read chunk with fallback: rows {start_row + 1} to {end_row} (chunk size: {len(chunk_df)})")
 
-            return chunk_df, start_row, end_row
+def _load_category_sheet(filename: str, content: Optional[bytes] = None) -> _CategorySheet:
+    """
+    Return the CATEGORY sheet of an Excel file, opening it only when the file is new or changed.
 
-        except Exception as fallback_error:
-            print(f"Fallback also failed: {str(fallback_error)}")
-            raise Exception(f"Failed to read Excel file CATEGORY sheet: {str(e)}")
+    Args:
+        filename (str): Path to Excel file
+        content (Optional[bytes]): Contents of the file if already in memory, to avoid reading it back from disk
 
+    Returns:
+        _CategorySheet: The sheet, shared between callers
+    """
+    path = os.path.abspath(filename)
+    cache_key = (path, os.stat(path).st_mtime)
+    sheet = _WORKBOOK_CACHE.get(cache_key)
+    if sheet is None:
+        sheet = _CategorySheet(path if content is None else io.BytesIO(content))
+        # Drop older versions of this file and the oldest workbooks beyond the cache size
+        for key in [key for key in _WORKBOOK_CACHE if key[0] == path]:
+            del _WORKBOOK_CACHE[key]
+        while len(_WORKBOOK_CACHE) >= _WORKBOOK_CACHE_SIZE:
+            del _WORKBOOK_CACHE[next(iter(_WORKBOOK_CACHE))]
+        _WORKBOOK_CACHE[cache_key] = sheet
+    return sheet
+
+
+def read_excel_chunk_with_calamine(filename: str, start_row: int, chunk_size: int = 100) -> tuple[
+    pd.DataFrame, int, int]:
+    """
+    Read Excel file using CalamineWorkbook and return a chunk of rows from the CATEGORY sheet
 
-def reset_excel_position():
-    """Reset the global Excel row position counter."""
-    global current_row_position
-    current_row_position = 0
-    print("Reset Excel position counter to 0")
+    Args:
+        filename (str): Path to Excel file
+        start_row (int): First data row of the chunk
+        chunk_size (int): Number of rows to read per chunk (default: 100)
 
+    Returns:
+        tuple: (DataFrame chunk, start_row, end_row)
+    """
+    try:
+        sheet = _load_category_sheet(filename)
+    except Exception as e:
+        logger.error(f"Error reading Excel file: {str(e)}")
+        raise Exception(f"Failed to read Excel file CATEGORY sheet: {str(e)}")
 
-def get_current_excel_position() -> int:
-    """Get the current Excel row position."""
-    global current_row_position
-    return current_row_position
+    total_rows = sheet.total_rows
 
+    if start_row >= total_rows:
+        logger.debug("Reached end of file")
+        return pd.DataFrame(), start_row, total_rows
 
-def has_more_chunks(excel_file_path: str) -> bool:
-    """Check if there are more chunks available in the Excel file CATEGORY sheet."""
-    try:
-        try:
-            from python_calamine import CalamineWorkbook
-            workbook = CalamineWorkbook.from_path(excel_file_path)
+    end_row = min(start_row + chunk_size, total_rows)
 
-            sheet_names = workbook.sheet_names
-            if "CATEGORY" not in sheet_names:
-                sheet_name = sheet_names[0] if sheet_names else "Sheet1"
-            else:
-                sheet_name = "CATEGORY"
+    # May be a view into the cached sheet, callers only read it
+    chunk_df = sheet.read(start_row, end_row)
 
-            sheet_data = workbook.get_sheet_by_name(sheet_name).to_python()
+    logger.debug("Read chunk: rows %d to %d (chunk size: %d)", start_row + 1, end_row, len(chunk_df))
 
-            if sheet_data:
-                headers = sheet_data[0]
-                data = sheet_data[1:]
-                df = pd.DataFrame(data, columns=headers)
-            else:
-                df = pd.DataFrame()
+    return chunk_df, start_row, end_row
 
-        except ImportError:
-            print("CalamineWorkbook not available, using pandas with calamine engine...")
-            try:
-                df = pd.read_excel(excel_file_path, engine='calamine', sheet_name="CATEGORY")
-            except:
-                print("Calamine engine failed, using default engine...")
-                df = pd.read_excel(excel_file_path, sheet_name="CATEGORY")
-        except Exception as e:
-            print(f"CalamineWorkbook failed: {e}, using pandas with calamine engine...")
-            try:
-                df = pd.read_excel(excel_file_path, engine='calamine', sheet_name="CATEGORY")
-            except:
-                print("Calamine engine failed, using default engine...")
-                df = pd.read_excel(excel_file_path, sheet_name="CATEGORY")
 
-        total_rows = len(df)
-        current_pos = get_current_excel_position()
+def has_more_chunks(excel_file_path: str, position: int) -> bool:
+    """Check if there are more chunks available in the Excel file CATEGORY sheet after the given row position."""
+    try:
+        total_rows = _load_category_sheet(excel_file_path).total_rows
 
-        return current_pos < total_rows
+        return position < total_rows
     except Exception as e:
-        print(f"Error checking for more chunks: {e}")
+        logger.error(f"Error checking for more chunks: {e}")
         return False
 
 
-def get_excel_file_info(excel_file_path: str) -> dict:
+def get_excel_file_info(excel_file_path: str, current_position: int = 0) -> dict:
     """Get information about the Excel file CATEGORY sheet."""
     try:
-        try:
-            from python_calamine import CalamineWorkbook
-            workbook = CalamineWorkbook.from_path(excel_file_path)
+        sheet = _load_category_sheet(excel_file_path)
 
-            sheet_names = workbook.sheet_names
-            print(f"Available sheets: {sheet_names}")
+        return {
+            'total_rows': sheet.total_rows,
+            'total_columns': len(sheet.columns),
+            'column_names': list(sheet.columns),
+            'current_position': current_position,
+            'remaining_rows': sheet.total_rows - current_position
+        }
+    except Exception as e:
+        logger.error(f"Error getting Excel file info: {e}")
+        return {}
 
-            if "CATEGORY" not in sheet_names:
-                print("CATEGORY sheet not found, using first available sheet...")
-                sheet_name = sheet_names[0] if sheet_names else "Sheet1"
-            else:
-                sheet_name = "CATEGORY"
 
-            print(f"Reading sheet: {sheet_name}")
-            sheet_data = workbook.get_sheet_by_name(sheet_name).to_python()
+@functools.lru_cache(maxsize=32)
+def _detect_keyword_columns(columns: tuple) -> tuple[Any, Optional[Any]]:
+    """
+    Find the keyword and category columns from a sheet's headers.
 
-            # Convert to DataFrame
-            if sheet_data:
-                # Use first row as headers
-                headers = sheet_data[0]
-                data = sheet_data[1:]  # Skip header row
-                df = pd.DataFrame(data, columns=headers)
-            else:
-                df = pd.DataFrame()
+    Cached on the headers, so the detection runs once per sheet rather than once per chunk.
 
-        except ImportError:
-            print("CalamineWorkbook not available, using pandas with calamine engine...")
-            try:
-                df = pd.read_excel(excel_file_path, engine='calamine', sheet_name="CATEGORY")
-            except:
-                print("Calamine engine failed, using default engine...")
-                df = pd.read_excel(excel_file_path, sheet_name="CATEGORY")
-        except Exception as e:
-            print(f"CalamineWorkbook failed: {e}, using pandas with calamine engine...")
-            try:
-                df = pd.read_excel(excel_file_path, engine='calamine', sheet_name="CATEGORY")
-            except:
-                print("Calamine engine failed, using default engine...")
-                df = pd.read_excel(excel_file_path, sheet_name="CATEGORY")
+    Args:
+        columns (tuple): Column headers of the sheet
 
-        return {
-            'total_rows': len(df),
-            'total_columns': len(df.columns),
-            'column_names': list(df.columns),
-            'current_position': get_current_excel_position(),
-            'remaining_rows': len(df) - get_current_excel_position()
-        }
-    except Exception as e:
-        print(f"Error getting Excel file info: {e}")
-        return {}
+    Returns:
+        tuple: (keyword column or None, category column or None)
+    """
+    keyword_column = None
+    category_column = None
+
+    for col in columns:
+        col_name = str(col)
+        if _KEYWORD_COLUMN_RE.search(col_name):
+            keyword_column = col
+        elif _CATEGORY_COLUMN_RE.search(col_name):
+            category_column = col
+
+    return keyword_column, category_column
+
+
+def _chunk_keywords(chunk_df: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
+    """
+    Extract the non-empty keywords of a chunk and their categories, column-wise.
+
+    Args:
+        chunk_df (pd.DataFrame): Chunk of the CATEGORY sheet
+
+    Returns:
+        tuple: (keywords, categories) as aligned string Series
+    """
+    keyword_column, category_column = _detect_keyword_columns(tuple(chunk_df.columns))
+    if keyword_column is None:
+        keyword_column = chunk_df.columns[0]
+        # Without a keyword header the first column is used, which holds no keywords when it is numeric
+        # (e.g. row numbers), so skip stringifying the whole chunk
+        if pd.api.types.is_numeric_dtype(chunk_df[keyword_column]):
+            empty = pd.Series([], dtype=object)
+            return empty, empty
+
+    keywords = chunk_df[keyword_column].astype(str).str.strip()
+    if category_column:
+        categories = chunk_df[category_column].astype(str).str.strip()
+    else:
+        categories = pd.Series('general', index=chunk_df.index)
+
+    mask = ~keywords.str.lower().isin(_SKIP_KEYWORDS)
+    return keywords[mask], categories[mask]
+
+
+def _write_keywords_excel(path: str, keywords_data: List[Dict[str, str]]) -> None:
+    """
+    Write keyword rows to an Excel file with openpyxl's write-only mode.
+
+    Rows are streamed to the file instead of building a DataFrame and a full in-memory workbook,
+    so large sessions are written faster and with bounded memory.
+
+    Args:
+        path (str): Path of the Excel file to write
+        keywords_data (List[Dict[str, str]]): Keyword rows, all with the same keys
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    columns = list(keywords_data[0])
+    sheet.append(columns)
+    for item in keywords_data:
+        sheet.append([item.get(column) for column in columns])
+    workbook.save(path)
 
 
 class KeywordEvaluation(BaseModel):
@@ -251,24 +458,25 @@ class ExcelProcessor(Workflow):
     identifying valuable keywords for content creation and SEO optimization.
     """)
 
+    # Instructions used when none are saved in the workflow settings, shared by all instances;
+    # subclasses can override it
+    default_instructions: ClassVar[str] = _DEFAULT_INSTRUCTIONS
+
     def __init__(self, **kwargs):
         """Initialize the ExcelProcessor and ensure database tables exist."""
         super().__init__(**kwargs)
-        # Initialize database tables
-        self._init_database()
-        # Initialize session manager
+        # Initialize session manager, which also creates the database tables if needed
         self.session_manager = ExcelSessionManager()
         # Initialize current session ID
         self.current_session_id = None
-
-    def _init_database(self):
-        """Initialize database tables if they don't exist."""
-        try:
-            from db.init_db import init_database
-            init_database()
-        except Exception as e:
-            logger.warning(f"Database initialization failed: {e}")
-            # Continue without failing the workflow initialization
+        # Next row to read of the Excel file being processed, per session, so concurrent runs don't share it
+        self._cursor: Dict[str, int] = {}
+        # Lowercased keywords already sent for analysis per session, so repeats aren't analyzed again
+        self._seen_keywords: Dict[str, set] = {}
+        # Lowercased keywords saved as valuable per session
+        self._saved_keywords: Dict[str, set] = {}
+        # Instructions rendered by get_agent_instructions per niche, with the template they came from
+        self._rendered_instructions: Dict[str, tuple[str, str]] = {}
 
     # Excel Analysis Agent: Analyzes keywords for SEO value
     keyword_analyzer: Agent = Agent(
@@ -487,6 +695,7 @@ The instructions are finished, so after analyzing and understanding them well an
         Returns:
             Iterator[RunResponse]: Streaming response with workflow progress
         """
+        session_id = None
         try:
             # Set the model for this workflow run
             self.set_model(model_id)
@@ -547,7 +756,9 @@ The instructions are finished, so after analyzing and understanding them well an
                 logger.warning(f"Invalid chunk_size '{chunk_size}', using default value of 100")
 
             # Update agent instructions with the dynamic niche
-            self.keyword_analyzer.instructions = self.get_agent_instructions(niche)
+            instructions = self.get_agent_instructions(niche)
+            if self.keyword_analyzer.instructions != instructions:
+                self.keyword_analyzer.instructions = instructions
 
             # Update session status to processing
             self.update_session_status("processing")
@@ -562,10 +773,14 @@ The instructions are finished, so after analyzing and understanding them well an
                 )
                 return
 
+            self._cursor[session_id] = 0
+            logger.info(f"Reset Excel position counter for new file: {excel_file_path}")
+
             # Get file info for progress tracking
             file_info = get_excel_file_info(excel_file_path)
             total_rows = file_info.get('total_rows', 0)
             column_names = file_info.get('column_names', [])
+            total_chunks = (total_rows + chunk_size_int - 1) // chunk_size_int
 
             # Initial progress message with enhanced structure
             initial_progress_message = (
@@ -578,7 +793,7 @@ The instructions are finished, so after analyzing and understanding them well an
                 f"| **Total Rows** | {total_rows} |\n"
                 f"| **Columns** | {', '.join(column_names[:5])}{'...' if len(column_names) > 5 else ''} |\n"
                 f"| **Chunk Size** | {chunk_size_int} rows |\n"
-                f"| **Estimated Chunks** | {(total_rows + chunk_size_int - 1) // chunk_size_int} |\n\n"
+                f"| **Estimated Chunks** | {total_chunks} |\n\n"
                 f"### 🔄 **Processing Strategy**\n\n"
                 f"• **Chunk-based Processing**: Analyzing {chunk_size_int} rows at a time for optimal performance\n"
                 f"• **AI-Powered Analysis**: Using advanced SEO and content creation criteria\n"
@@ -599,117 +814,132 @@ The instructions are finished, so after analyzing and understanding them well an
             total_keywords = 0
             chunk_number = 0
 
-            while has_more_chunks(excel_file_path):
-                chunk_number += 1
-                current_pos = get_current_excel_position()
-
-                # Read chunk
-                chunk_df, start_row, end_row = read_excel_chunk_with_calamine(excel_file_path, chunk_size=chunk_size_int)
-
-                if chunk_df.empty:
-                    break
-
-                # Calculate progress
-                progress_percentage = (current_pos / total_rows * 100) if total_rows > 0 else 0
-                remaining_chunks = (total_rows - current_pos + chunk_size_int - 1) // chunk_size_int
-
-                # Prepare keywords for analysis
-                keywords_text = self.prepare_keywords_for_analysis(chunk_df, start_row, end_row)
-                if not keywords_text:
-                    # Skip empty chunks
-                    yield RunResponse(
-                        run_id=self.run_id,
-                        content=f"⏭️ **Chunk {chunk_number} Skipped**\n\n"
-                                f"📊 Position: {current_pos}/{total_rows} rows ({progress_percentage:.1f}%)\n"
-                                f"📝 No valid keywords found in rows {start_row + 1}-{end_row}\n"
-                                f"🔄 Remaining chunks: {remaining_chunks}\n\n"
-                                f"---"
+            pending = deque()
+            more_chunks = True
+
+            with ThreadPoolExecutor(max_workers=ANALYSIS_CONCURRENCY) as executor:
+                while more_chunks or pending:
+                    # total_rows comes from the cached sheet, so checking for more chunks needs no file access
+                    more_chunks = more_chunks and self._cursor[session_id] < total_rows
+                    # Report finished analyses in chunk order, so the saved keywords keep the sheet's row
+                    # order, while keeping up to ANALYSIS_CONCURRENCY chunks at the analyzer. The next
+                    # chunk is read while the earlier ones are still being analyzed.
+                    while pending and (len(pending) >= ANALYSIS_CONCURRENCY or not more_chunks):
+                        future, chunk_number_done, current_pos, progress_percentage, remaining_chunks = pending.popleft()
+                        analysis = future.result()
+                        if analysis is None:
+                            continue
+
+                        # Save results, keeping only the first evaluation of keywords the analyzer returns more than once
+                        saved_keywords = self._saved_keywords.setdefault(session_id, set())
+                        keywords_data = []
+                        for keyword_eval in analysis.valuable_keywords:
+                            normalized = keyword_eval.keyword.lower()
+                            if normalized not in saved_keywords:
+                                saved_keywords.add(normalized)
+                                keywords_data.append({'keyword': keyword_eval.keyword, 'reason': keyword_eval.reason})
+                        top_keywords = [item['keyword'] for item in keywords_data[:10]]
+
+                        total_keywords += len(keywords_data)
+                        self.save_keywords_to_session(session_id, keywords_data)
+
+                        # Show chunk results with enhanced structure
+                        chunk_complete_message = (
+                            f"## ✅ **Chunk {chunk_number_done} Complete**\n\n"
+                            f"### 📊 **Chunk Summary**\n\n"
+                            f"| Metric | Value |\n"
+                            f"|--------|-------|\n"
+                            f"| **Position** | {current_pos}/{total_rows} rows |\n"
+                            f"| **Progress** | {progress_percentage:.1f}% |\n"
+                            f"| **Valuable Keywords Found** | {len(keywords_data)} |\n"
+                            f"| **Total Accumulated** | {total_keywords} |\n"
+                            f"| **Remaining Chunks** | {remaining_chunks} |\n\n"
+                            f"### 🎯 **Top Valuable Keywords from This Chunk**\n\n"
+                            f"{', '.join(top_keywords)}{'...' if len(keywords_data) > 10 else ''}\n\n"
+                            f"### 💡 **Sample Analysis Reasons**\n\n"
+                            f"{self.format_sample_reasons(keywords_data[:3])}\n\n"
+                            f"### 📈 **Progress Update**\n\n"
+                            f"🔄 **{total_keywords} valuable keywords identified so far**\n\n"
+                            f"---"
+                        )
+
+                        # Store chunk completion message
+                        self.session_manager.store_workflow_response(session_id, chunk_complete_message, "assistant")
+
+                        yield RunResponse(
+                            run_id=self.run_id,
+                            content=chunk_complete_message
+                        )
+
+                    if not more_chunks:
+                        continue
+
+                    chunk_number += 1
+                    current_pos = self._cursor[session_id]
+
+                    # Read chunk
+                    chunk_df, start_row, end_row = read_excel_chunk_with_calamine(
+                        excel_file_path, current_pos, chunk_size=chunk_size_int
                     )
-                    continue
-
-                
-                keywords_for_display = self.extract_keywords_for_display(chunk_df, start_row, end_row)
-
-                
-                chunk_start_message = (
-                    f"## 🔍 **Processing Chunk {chunk_number}**\n\n"
-                    f"### 📊 **Progress Overview**\n\n"
-                    f"| Metric | Value |\n"
-                    f"|--------|-------|\n"
-                    f"| **Current Position** | {current_pos}/{total_rows} rows |\n"
-                    f"| **Progress** | {progress_percentage:.1f}% |\n"
-                    f"| **Keywords in Chunk** | {len(keywords_for_display)} |\n"
-                    f"| **Rows Range** | {start_row + 1}-{end_row} |\n"
-                    f"| **Remaining Chunks** | {remaining_chunks} |\n\n"
-                    f"### 📝 **Keywords Being Analyzed**\n\n"
-                    f"{keywords_for_display}\n\n"
-                    f"### 🤖 **AI Analysis Status**\n\n"
-                    f"🔄 **Analyzing keywords for SEO value in the {niche} niche...**\n\n"
-                    f"*This may take a few moments as the AI evaluates each keyword based on SEO best practices and content creation potential.*"
-                )
-                
-                self.session_manager.store_workflow_response(session_id, chunk_start_message, "assistant")
-                
-                yield RunResponse(
-                    run_id=self.run_id,
-                    content=chunk_start_message
-                )
-
-                analysis_result = self.keyword_analyzer.run(keywords_text)
-
-                last_response = None
-                try:
-                    for resp in analysis_result: 
-                        last_response = resp
-                except TypeError:
-                    last_response = analysis_result
-
-                if (
-                    last_response is not None
-                    and getattr(last_response, "content", None) is not None
-                    and isinstance(last_response.content, ExcelChunkAnalysis)
-                ):
-                    # Save results
-                    keywords_data = []
-                    valuable_keywords = []
-                    for keyword_eval in last_response.content.valuable_keywords:
-                        keywords_data.append({
-                            'keyword': keyword_eval.keyword,
-                            'reason': keyword_eval.reason
-                        })
-                        valuable_keywords.append(keyword_eval.keyword)
-
-                    total_keywords += len(keywords_data)
-                    self.save_keywords_to_session(session_id, keywords_data)
-
-                    # Show chunk results with enhanced structure
-                    chunk_complete_message = (
-                        f"## ✅ **Chunk {chunk_number} Complete**\n\n"
-                        f"### 📊 **Chunk Summary**\n\n"
+                    self._cursor[session_id] = end_row
+
+                    if chunk_df.empty:
+                        more_chunks = False
+                        continue
+
+                    # Calculate progress
+                    progress_percentage = (current_pos / total_rows * 100) if total_rows > 0 else 0
+                    # Chunks left including this one, as every earlier chunk was a full chunk_size_int rows
+                    remaining_chunks = total_chunks - chunk_number + 1
+
+                    # Prepare keywords for analysis, extracting them once for both the prompt and the progress message
+                    try:
+                        chunk_keywords = self._drop_seen_keywords(session_id, *_chunk_keywords(chunk_df))
+                    except Exception as e:
+                        logger.error(f"Error extracting keywords from chunk: {e}")
+                        chunk_keywords = None
+                    keywords_text = self.prepare_keywords_for_analysis(chunk_df, start_row, end_row, chunk_keywords)
+                    if not keywords_text:
+                        # Skip empty chunks
+                        yield RunResponse(
+                            run_id=self.run_id,
+                            content=f"⏭️ **Chunk {chunk_number} Skipped**\n\n"
+                                    f"📊 Position: {current_pos}/{total_rows} rows ({progress_percentage:.1f}%)\n"
+                                    f"📝 No valid keywords found in rows {start_row + 1}-{end_row}\n"
+                                    f"🔄 Remaining chunks: {remaining_chunks}\n\n"
+                                    f"---"
+                        )
+                        continue
+
+                    keywords_for_display = self.extract_keywords_for_display(chunk_df, start_row, end_row, chunk_keywords)
+
+                    chunk_start_message = (
+                        f"## 🔍 **Processing Chunk {chunk_number}**\n\n"
+                        f"### 📊 **Progress Overview**\n\n"
                         f"| Metric | Value |\n"
                         f"|--------|-------|\n"
-                        f"| **Position** | {current_pos}/{total_rows} rows |\n"
+                        f"| **Current Position** | {current_pos}/{total_rows} rows |\n"
                         f"| **Progress** | {progress_percentage:.1f}% |\n"
-                        f"| **Valuable Keywords Found** | {len(keywords_data)} |\n"
-                        f"| **Total Accumulated** | {total_keywords} |\n"
+                        f"| **Keywords in Chunk** | {len(keywords_for_display)} |\n"
+                        f"| **Rows Range** | {start_row + 1}-{end_row} |\n"
                         f"| **Remaining Chunks** | {remaining_chunks} |\n\n"
-                        f"### 🎯 **Top Valuable Keywords from This Chunk**\n\n"
-                        f"{', '.join(valuable_keywords[:10])}{'...' if len(valuable_keywords) > 10 else ''}\n\n"
-                        f"### 💡 **Sample Analysis Reasons**\n\n"
-                        f"{self.format_sample_reasons(keywords_data[:3])}\n\n"
-                        f"### 📈 **Progress Update**\n\n"
-                        f"🔄 **{total_keywords} valuable keywords identified so far**\n\n"
-                        f"---"
+                        f"### 📝 **Keywords Being Analyzed**\n\n"
+                        f"{keywords_for_display}\n\n"
+                        f"### 🤖 **AI Analysis Status**\n\n"
+                        f"🔄 **Analyzing keywords for SEO value in the {niche} niche...**\n\n"
+                        f"*This may take a few moments as the AI evaluates each keyword based on SEO best practices and content creation potential.*"
                     )
-                    
-                    # Store chunk completion message
-                    self.session_manager.store_workflow_response(session_id, chunk_complete_message, "assistant")
-                    
+
+                    self.session_manager.store_workflow_response(session_id, chunk_start_message, "assistant")
+
                     yield RunResponse(
                         run_id=self.run_id,
-                        content=chunk_complete_message
+                        content=chunk_start_message
                     )
 
+                    future = executor.submit(self.analyze_keywords, keywords_text)
+                    pending.append((future, chunk_number, current_pos, progress_percentage, remaining_chunks))
+
             final_results = self.finalize_session(session_id)
             
             # Store final results message
@@ -734,29 +964,88 @@ The instructions are finished, so after analyzing and understanding them well an
         except Exception as e:
             logger.error(f"Error in Excel workflow run: {e}", exc_info=True)
             # Update session status to failed
-            if hasattr(self, 'current_session_id') and self.current_session_id:
+            if self.current_session_id:
                 self.update_session_status("failed")
             
             yield RunResponse(
                 run_id=self.run_id if hasattr(self, 'run_id') else None,
                 content=f"## ❌ **An Error Occurred**\n\nAn unexpected error occurred during processing: `{str(e)}`\n\nPlease try again or check the application logs for more details."
             )
+        finally:
+            self._cursor.pop(session_id, None)
+            self._seen_keywords.pop(session_id, None)
+            self._saved_keywords.pop(session_id, None)
+            # Persist any workflow responses still buffered by the session manager
+            self.session_manager.close()
+
+
+    def _drop_seen_keywords(
+        self, session_id: str, keywords: pd.Series, categories: pd.Series
+    ) -> tuple[pd.Series, pd.Series]:
+        """
+        Drop keywords that repeat, ignoring case, within the chunk or an earlier chunk of the session.
+
+        Args:
+            session_id: Session the chunk belongs to
+            keywords: Keywords of the chunk from _chunk_keywords
+            categories: Categories aligned with keywords
+
+        Returns:
+            tuple: (keywords, categories) without the repeats
+        """
+        seen = self._seen_keywords.setdefault(session_id, set())
+        normalized = keywords.str.lower()
+        mask = ~(normalized.isin(seen) | normalized.duplicated())
+        seen.update(normalized[mask])
+        return keywords[mask], categories[mask]
+
+    def analyze_keywords(self, keywords_text: str) -> Optional[ExcelChunkAnalysis]:
+        """
+        Run the keyword analyzer on one chunk of keywords.
+
+        Each call works on its own copy of the analyzer, so several chunks can be analyzed
+        concurrently without sharing run state.
+
+        Args:
+            keywords_text: Keywords prepared by prepare_keywords_for_analysis
 
+        Returns:
+            Optional[ExcelChunkAnalysis]: The structured analysis, or None if the agent didn't return one
+        """
+        analysis_result = self.keyword_analyzer.deep_copy().run(keywords_text)
 
-    def list_sessions(self, user_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        last_response = None
+        try:
+            for resp in analysis_result:
+                last_response = resp
+        except TypeError:
+            last_response = analysis_result
+
+        if (
+            last_response is not None
+            and getattr(last_response, "content", None) is not None
+            and isinstance(last_response.content, ExcelChunkAnalysis)
+        ):
+            return last_response.content
+        return None
+
+    def list_sessions(
+        self, user_id: Optional[str] = None, limit: int = 50, before: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
         """
         List Excel workflow sessions.
         
         Args:
             user_id: Optional user ID to filter by
             limit: Maximum number of sessions to return
+            before: Optional cursor, only sessions created before it are returned
             
         Returns:
             List of session dictionaries
         """
         try:
             session_manager = ExcelSessionManager()
-            return session_manager.list_user_sessions(user_id=user_id, limit=limit)
+            return session_manager.list_user_sessions(user_id=user_id, limit=limit, before=before)
         except Exception as e:
             logger.error(f"Error listing sessions: {e}")
             return []
@@ -767,8 +1056,26 @@ The instructions are finished, so after analyzing and understanding them well an
 
     def add_results_to_cache(self, session_id: str, results: str):
         logger.info(f"Saving results for session: {session_id}")
-        self.session_state.setdefault("excel_results", {})
-        self.session_state["excel_results"][session_id] = results
+        self._put_session_state("excel_results", session_id, results)
+
+    def _put_session_state(self, key: str, session_id: str, value: Any) -> None:
+        """
+        Store a per-session value under session_state[key], keeping only the most recent sessions.
+
+        The entries are a plain dict so session_state stays JSON-serializable for the workflow storage,
+        and dicts keep insertion order, so the first entries are the least recently stored.
+
+        Args:
+            key: session_state key holding the per-session dict
+            session_id: Session the value belongs to
+            value: Value to store
+        """
+        entries = self.session_state.setdefault(key, {})
+        # Re-insert so the session counts as the most recent one
+        entries.pop(session_id, None)
+        entries[session_id] = value
+        while len(entries) > MAX_CACHED_SESSIONS:
+            del entries[next(iter(entries))]
 
     def process_excel_file(self, file_path: str, session_id: Optional[str] = None) -> Optional[str]:
         """Process Excel file from file path or base64 string."""
@@ -779,38 +1086,32 @@ The instructions are finished, so after analyzing and understanding them well an
             # Check if it's a base64 string or a file path
             if file_path.startswith("data:") or file_path.startswith("base64:"):
                 # It's a base64 string
-                base64_string = file_path.replace("data:", "").replace("base64:", "")
-                base64_string = base64_string.strip().replace('\n', '').replace('\r', '')
-
-                if not base64_string:
+                # Work on one bytes copy of the payload, only copying it again when it has whitespace to strip
+                try:
+                    base64_bytes = file_path.encode("ascii")
+                except UnicodeEncodeError:
                     return None
+                for prefix in (b"data:", b"base64:"):
+                    base64_bytes = base64_bytes.removeprefix(prefix)
+                if any(whitespace in base64_bytes for whitespace in (b" ", b"\t", b"\r", b"\n")):
+                    base64_bytes = base64_bytes.translate(None, b" \t\r\n")
 
-                try:
-                    import re
-                    if not re.match(r'^[A-Za-z0-9+/]*={0,2}$', base64_string):
-                        return None
-                except Exception:
+                if not base64_bytes:
                     return None
 
+                # validate=True rejects anything outside the base64 alphabet while decoding
                 try:
-                    excel_bytes = base64.b64decode(base64_string)
-                except Exception:
+                    excel_bytes = base64.b64decode(base64_bytes, validate=True)
+                except binascii.Error:
                     return None
+                # Free the encoded copy before the workbook is opened from the decoded bytes
+                del base64_bytes
 
                 if not excel_bytes:
                     return None
 
-                try:
-                    excel_signatures = [
-                        b'\x50\x4B\x03\x04',
-                        b'\xD0\xCF\x11\xE0',
-                        b'\x09\x08\x10\x00',
-                    ]
-                    is_excel_file = any(excel_bytes.startswith(sig) for sig in excel_signatures)
-                    if not is_excel_file:
-                        return None
-                except Exception:
-                    pass
+                if not excel_bytes.startswith(_EXCEL_SIGNATURES):
+                    return None
 
                 session_id = session_id or 'default'
                 excel_file_path = f"tmp/input_excel_{session_id}.xlsx"
@@ -826,88 +1127,56 @@ The instructions are finished, so after analyzing and understanding them well an
                 except Exception:
                     return None
 
+                # Open the workbook from the decoded bytes so the chunk readers don't read the file back
+                try:
+                    _load_category_sheet(excel_file_path, excel_bytes)
+                except Exception as e:
+                    logger.warning(f"Could not open decoded Excel file: {e}")
+
             else:
                 # It's a file path
                 excel_file_path = file_path
 
-            if not os.path.exists(excel_file_path):
+            try:
+                file_size = os.stat(excel_file_path).st_size
+            except FileNotFoundError:
                 return None
-
-            file_size = os.path.getsize(excel_file_path)
             if file_size == 0:
                 return None
 
-            reset_excel_position()
-            logger.info(f"Reset Excel position counter for new file: {excel_file_path}")
-
             return excel_file_path
 
         except Exception as e:
             logger.error(f"Error processing Excel file: {e}")
             return None
 
-    def prepare_keywords_for_analysis(self, chunk_df: pd.DataFrame, start_row: int, end_row: int) -> Optional[str]:
-        """Prepare keywords from DataFrame for analysis."""
+    def prepare_keywords_for_analysis(
+        self, chunk_df: pd.DataFrame, start_row: int, end_row: int,
+        chunk_keywords: Optional[tuple[pd.Series, pd.Series]] = None
+    ) -> Optional[str]:
+        """Prepare keywords from DataFrame for analysis, reusing chunk_keywords from _chunk_keywords if given."""
         try:
-            keyword_column = None
-            category_column = None
-
-            for col in chunk_df.columns:
-                col_lower = str(col).lower()
-                if any(keyword in col_lower for keyword in ['keyword', 'term', 'phrase', 'word']):
-                    keyword_column = col
-                elif any(cat in col_lower for cat in ['category', 'type', 'class', 'group']):
-                    category_column = col
-
-            if not keyword_column:
-                keyword_column = chunk_df.columns[0]
-
-            if not category_column:
-                category_column = 'category'
-                chunk_df[category_column] = 'general'
-
-            keywords_with_category = []
-            for _, row in chunk_df.iterrows():
-                keyword = str(row[keyword_column]).strip()
-                category = str(row[category_column]).strip()
-                if keyword and keyword.lower() not in ['nan', 'none', '']:
-                    keywords_with_category.append({
-                        'keyword': keyword,
-                        'category': category
-                    })
-
-            if not keywords_with_category:
-                return None
+            keywords, categories = chunk_keywords if chunk_keywords is not None else _chunk_keywords(chunk_df)
 
-            keywords_text = f"Please analyze the following keywords from the Excel file (rows {start_row + 1} to {end_row}):\n\n"
-            for item in keywords_with_category:
-                keywords_text += f"- Keyword: {item['keyword']}, Category: {item['category']}\n"
+            if keywords.empty:
+                return None
 
-            return keywords_text
+            header = f"Please analyze the following keywords from the Excel file (rows {start_row + 1} to {end_row}):\n\n"
+            return "".join([header, *("- Keyword: " + keywords + ", Category: " + categories + "\n")])
 
         except Exception as e:
             logger.error(f"Error preparing keywords for analysis: {e}")
             return None
 
     def save_keywords_to_session(self, session_id: Optional[str], keywords_data: List[Dict[str, str]]):
-        """Save keywords to session-specific Excel file."""
+        """Append keywords to the session-specific keywords file, the Excel file is written by finalize_session."""
         try:
             session_id = session_id or 'default'
-            session_excel_file = f"tmp/session_keywords_{session_id}.xlsx"
+            session_keywords_file = f"tmp/session_keywords_{session_id}.jsonl"
 
-            existing_keywords = []
-            if os.path.exists(session_excel_file):
-                try:
-                    existing_df = pd.read_excel(session_excel_file)
-                    existing_keywords = existing_df.to_dict('records')
-                except:
-                    existing_keywords = []
-
-            existing_keywords.extend(keywords_data)
-
-            if existing_keywords:
-                df = pd.DataFrame(existing_keywords)
-                df.to_excel(session_excel_file, index=False)
+            # Append-only, so each chunk costs O(chunk) instead of rewriting the whole workbook
+            with open(session_keywords_file, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(item, ensure_ascii=False) + "\n" for item in keywords_data)
 
         except Exception as e:
             logger.error(f"Error saving keywords to session: {e}")
@@ -917,11 +1186,24 @@ The instructions are finished, so after analyzing and understanding them well an
         try:
             session_id = session_id or 'default'
             session_excel_file = f"tmp/session_keywords_{session_id}.xlsx"
+            session_keywords_file = f"tmp/session_keywords_{session_id}.jsonl"
             session_keywords = []
 
-            if os.path.exists(session_excel_file):
+            if os.path.exists(session_keywords_file):
+                # Write the keywords collected by save_keywords_to_session to the Excel file in one go
+                try:
+                    with open(session_keywords_file, encoding='utf-8') as f:
+                        session_keywords = [json.loads(line) for line in f if line.strip()]
+                    if session_keywords:
+                        _write_keywords_excel(session_excel_file, session_keywords)
+                    os.remove(session_keywords_file)
+                except Exception as e:
+                    logger.warning(f"Could not write session Excel file '{session_excel_file}': {e}")
+            elif os.path.exists(session_excel_file):
                 try:
-                    df = pd.read_excel(session_excel_file)
+                    df = pd.read_excel(
+                        session_excel_file, engine='calamine' if CalamineWorkbook is not None else None
+                    )
                     session_keywords = df.to_dict('records')
                 except Exception as e:
                     logger.warning(f"Could not read session Excel file '{session_excel_file}': {e}")
@@ -929,63 +1211,65 @@ The instructions are finished, so after analyzing and understanding them well an
 
             if session_keywords:
                 # Enhanced structured result
-                result = f"🎉 **Excel Keyword Analysis Complete!**\n\n"
+                parts = [f"🎉 **Excel Keyword Analysis Complete!**\n\n"]
                 
                 # Summary section
-                result += f"## 📊 **Analysis Summary**\n\n"
-                result += f"| Metric | Value |\n"
-                result += f"|--------|-------|\n"
-                result += f"| **Total Keywords Analyzed** | {len(session_keywords)} |\n"
-                result += f"| **File Size** | {self.get_file_size(session_excel_file)} MB |\n"
-                result += f"| **Processing Status** | ✅ Complete |\n"
-                result += f"| **Results File** | `{os.path.basename(session_excel_file)}` |\n\n"
+                parts.append(f"## 📊 **Analysis Summary**\n\n")
+                parts.append(f"| Metric | Value |\n")
+                parts.append(f"|--------|-------|\n")
+                parts.append(f"| **Total Keywords Analyzed** | {len(session_keywords)} |\n")
+                parts.append(f"| **File Size** | {self.get_file_size(session_excel_file)} MB |\n")
+                parts.append(f"| **Processing Status** | ✅ Complete |\n")
+                parts.append(f"| **Results File** | `{os.path.basename(session_excel_file)}` |\n\n")
                 
                 # Top keywords section as a table for better formatting
-                result += f"## 🎯 **Top 10 Valuable Keywords & Analysis**\n\n"
-                result += f"| # | Keyword | Reason for Selection |\n"
-                result += f"|---|---------|----------------------|\n"
+                parts.append(f"## 🎯 **Top 10 Valuable Keywords & Analysis**\n\n")
+                parts.append(f"| # | Keyword | Reason for Selection |\n")
+                parts.append(f"|---|---------|----------------------|\n")
                 top_keywords = session_keywords[:10]
                 for i, item in enumerate(top_keywords, 1):
                     keyword = item['keyword']
-                    reason = str(item.get('reason', '')).replace('\n', ' ').replace('|', ' ') # Sanitize for table
+                    reason = str(item.get('reason', '')).translate(_TABLE_CELL_TRANSLATION)
                     reason = reason[:100] + "..." if len(reason) > 100 else reason
-                    result += f"| **{i}** | `{keyword}` | *{reason}* |\n"
+                    parts.append(f"| **{i}** | `{keyword}` | *{reason}* |\n")
 
                 if len(session_keywords) > 10:
-                    result += f"\n*... and {len(session_keywords) - 10} more valuable keywords are available in the downloadable Excel file.*\n\n"
+                    parts.append(f"\n*... and {len(session_keywords) - 10} more valuable keywords are available in the downloadable Excel file.*\n\n")
                 
                 # Keyword Insights section
                 keyword_categories = self.analyze_keyword_categories(session_keywords)
                 if keyword_categories:
-                    result += f"## 💡 **Keyword Insights**\n\n"
-                    result += f"Your keyword list has been analyzed and categorized based on user intent:\n\n"
-                    result += f"| Category | Count | Description |\n"
-                    result += f"|----------|-------|-------------|\n"
+                    parts.append(f"## 💡 **Keyword Insights**\n\n")
+                    parts.append(f"Your keyword list has been analyzed and categorized based on user intent:\n\n")
+                    parts.append(f"| Category | Count | Description |\n")
+                    parts.append(f"|----------|-------|-------------|\n")
                     if 'question_keywords' in keyword_categories:
-                        result += f"| **Question-Based** | {keyword_categories.get('question_keywords', 0)} | Keywords phrased as questions (who, what, why, etc.) |\n"
+                        parts.append(f"| **Question-Based** | {keyword_categories.get('question_keywords', 0)} | Keywords phrased as questions (who, what, why, etc.) |\n")
                     if 'comparison_keywords' in keyword_categories:
-                        result += f"| **Comparison** | {keyword_categories.get('comparison_keywords', 0)} | Keywords comparing products or services (best, top, vs) |\n"
+                        parts.append(f"| **Comparison** | {keyword_categories.get('comparison_keywords', 0)} | Keywords comparing products or services (best, top, vs) |\n")
                     if 'benefit_keywords' in keyword_categories:
-                        result += f"| **Benefit-Oriented** | {keyword_categories.get('benefit_keywords', 0)} | Keywords focused on advantages and benefits |\n"
+                        parts.append(f"| **Benefit-Oriented** | {keyword_categories.get('benefit_keywords', 0)} | Keywords focused on advantages and benefits |\n")
                     if 'how_to_keywords' in keyword_categories:
-                        result += f"| **How-To/Guides** | {keyword_categories.get('how_to_keywords', 0)} | Keywords that suggest instructional content |\n"
+                        parts.append(f"| **How-To/Guides** | {keyword_categories.get('how_to_keywords', 0)} | Keywords that suggest instructional content |\n")
                     if 'general_keywords' in keyword_categories:
-                        result += f"| **General Informational** | {keyword_categories.get('general_keywords', 0)} | Broad topics for general articles |\n"
-                    result += "\n*This can help you plan different types of content to meet user needs.*\n\n"
+                        parts.append(f"| **General Informational** | {keyword_categories.get('general_keywords', 0)} | Broad topics for general articles |\n")
+                    parts.append("\n*This can help you plan different types of content to meet user needs.*\n\n")
 
                 # Final success message
-                result += f"✅ **Your keyword analysis is ready!** Download the Excel file to access all valuable keywords.\n\n"
+                parts.append(f"✅ **Your keyword analysis is ready!** Download the Excel file to access all valuable keywords.\n\n")
                 
                 # Save enhanced data to session
                 self.save_enhanced_session_data(session_id, session_keywords, session_excel_file)
                 
             else:
-                result = "## ⚠️ **Analysis Complete**\n\n"
-                result += "No valuable keywords were found in this session. This could be due to:\n\n"
-                result += "• Keywords not meeting the AI's quality criteria\n"
-                result += "• The provided Excel file being empty or having an unsupported format\n"
-                result += "• Incorrect column names (the tool looks for a 'Keyword' column)\n\n"
-                result += "**Recommendation:** Please check your Excel file and try again, or adjust the AI instructions in the sidebar for different results."
+                parts = ["## ⚠️ **Analysis Complete**\n\n"]
+                parts.append("No valuable keywords were found in this session. This could be due to:\n\n")
+                parts.append("• Keywords not meeting the AI's quality criteria\n")
+                parts.append("• The provided Excel file being empty or having an unsupported format\n")
+                parts.append("• Incorrect column names (the tool looks for a 'Keyword' column)\n\n")
+                parts.append("**Recommendation:** Please check your Excel file and try again, or adjust the AI instructions in the sidebar for different results.")
+
+            result = "".join(parts)
 
             if session_id:
                 self.add_results_to_cache(session_id, result)
@@ -1016,8 +1300,7 @@ The instructions are finished, so after analyzing and understanding them well an
             }
             
             # Save to session cache
-            self.session_state.setdefault("enhanced_session_data", {})
-            self.session_state["enhanced_session_data"][session_id] = enhanced_data
+            self._put_session_state("enhanced_session_data", session_id, enhanced_data)
             
             logger.info(f"Enhanced session data saved for session: {session_id}")
             
@@ -1027,31 +1310,33 @@ The instructions are finished, so after analyzing and understanding them well an
     def analyze_keyword_categories(self, keywords_data: List[Dict[str, str]]) -> Dict[str, int]:
         """Analyze keyword categories for insights."""
         try:
+            keywords = pd.Series([item['keyword'] for item in keywords_data], dtype=object).astype(str).str.lower()
+            # Each keyword counts towards the first pattern it matches, in _KEYWORD_INTENT_PATTERNS order
+            unmatched = pd.Series(True, index=keywords.index)
             categories = {}
-            for item in keywords_data:
-                keyword = item['keyword'].lower()
-                
-                # Simple category detection based on keyword patterns
-                if any(word in keyword for word in ['how', 'what', 'why', 'when', 'where']):
-                    categories['question_keywords'] = categories.get('question_keywords', 0) + 1
-                elif any(word in keyword for word in ['best', 'top', 'review', 'compare']):
-                    categories['comparison_keywords'] = categories.get('comparison_keywords', 0) + 1
-                elif any(word in keyword for word in ['benefits', 'advantages', 'pros', 'effects']):
-                    categories['benefit_keywords'] = categories.get('benefit_keywords', 0) + 1
-                elif any(word in keyword for word in ['recipe', 'how to', 'tutorial', 'guide']):
-                    categories['how_to_keywords'] = categories.get('how_to_keywords', 0) + 1
-                else:
-                    categories['general_keywords'] = categories.get('general_keywords', 0) + 1
-            
+            for category, pattern in _KEYWORD_INTENT_PATTERNS:
+                matches = unmatched & keywords.str.contains(pattern)
+                count = int(matches.sum())
+                if count:
+                    categories[category] = count
+                unmatched &= ~matches
+
+            general_count = int(unmatched.sum())
+            if general_count:
+                categories['general_keywords'] = general_count
+
             return categories
         except Exception as e:
             logger.error(f"Error analyzing keyword categories: {e}")
             return {}
 
     def get_enhanced_session_data(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get enhanced session data from cache."""
+        """Get enhanced session data from cache, or from the database for sessions finalized elsewhere."""
         try:
-            return self.session_state.get("enhanced_session_data", {}).get(session_id)
+            enhanced_data = self.session_state.get("enhanced_session_data", {}).get(session_id)
+            if enhanced_data is None:
+                enhanced_data = self.session_manager.get_enhanced_data(session_id)
+            return enhanced_data
         except Exception as e:
             logger.error(f"Error getting enhanced session data: {e}")
             return None
@@ -1059,9 +1344,7 @@ The instructions are finished, so after analyzing and understanding them well an
     def get_workflow_responses(self, session_id: str) -> List[Dict[str, Any]]:
         """Get workflow responses for a session."""
         try:
-            if hasattr(self, 'session_manager'):
-                return self.session_manager.get_workflow_responses(session_id)
-            return []
+            return self.session_manager.get_workflow_responses(session_id)
         except Exception as e:
             logger.error(f"Error getting workflow responses: {e}")
             return []
@@ -1069,9 +1352,7 @@ The instructions are finished, so after analyzing and understanding them well an
     def clear_workflow_responses(self, session_id: str) -> bool:
         """Clear workflow responses for a session."""
         try:
-            if hasattr(self, 'session_manager'):
-                return self.session_manager.clear_workflow_responses(session_id)
-            return False
+            return self.session_manager.clear_workflow_responses(session_id)
         except Exception as e:
             logger.error(f"Error clearing workflow responses: {e}")
             return False
@@ -1095,49 +1376,26 @@ The instructions are finished, so after analyzing and understanding them well an
     def get_file_size(self, file_path: str) -> str:
         """Get file size in MB."""
         try:
-            if os.path.exists(file_path):
-                size_bytes = os.path.getsize(file_path)
-                size_mb = size_bytes / (1024 * 1024)
-                return f"{size_mb:.2f}"
-            return "0.00"
+            size_mb = os.stat(file_path).st_size / (1024 * 1024)
+            return f"{size_mb:.2f}"
         except Exception:
             return "0.00"
 
-    def extract_keywords_for_display(self, chunk_df: pd.DataFrame, start_row: int, end_row: int) -> str:
-        """Extract and format keywords for display."""
+    def extract_keywords_for_display(
+        self, chunk_df: pd.DataFrame, start_row: int, end_row: int,
+        chunk_keywords: Optional[tuple[pd.Series, pd.Series]] = None
+    ) -> str:
+        """Extract and format keywords for display, reusing chunk_keywords from _chunk_keywords if given."""
         try:
-            keyword_column = None
-            category_column = None
-
-            for col in chunk_df.columns:
-                col_lower = str(col).lower()
-                if any(keyword in col_lower for keyword in ['keyword', 'term', 'phrase', 'word']):
-                    keyword_column = col
-                elif any(cat in col_lower for cat in ['category', 'type', 'class', 'group']):
-                    category_column = col
-
-            if not keyword_column:
-                keyword_column = chunk_df.columns[0]
-
-            keywords_with_category = []
-            for _, row in chunk_df.iterrows():
-                keyword = str(row[keyword_column]).strip()
-                category = str(row[category_column]).strip() if category_column else 'general'
-                if keyword and keyword.lower() not in ['nan', 'none', '']:
-                    keywords_with_category.append({
-                        'keyword': keyword,
-                        'category': category
-                    })
-
-            if keywords_with_category:
-                display_lines = []
-                for i, item in enumerate(keywords_with_category[:15]):
-                    display_lines.append(f"• {item['keyword']} ({item['category']})")
-
-                if len(keywords_with_category) > 15:
-                    display_lines.append(f"... and {len(keywords_with_category) - 15} more")
-
-                return '\n'.join(display_lines)
+            keywords, categories = chunk_keywords if chunk_keywords is not None else _chunk_keywords(chunk_df)
+
+            if not keywords.empty:
+                display = '\n'.join("• " + keywords.iloc[:15] + " (" + categories.iloc[:15] + ")")
+
+                if len(keywords) > 15:
+                    display = f"{display}\n... and {len(keywords) - 15} more"
+
+                return display
             else:
                 return "No valid keywords found in this chunk."
 
@@ -1150,12 +1408,10 @@ The instructions are finished, so after analyzing and understanding them well an
         if not keywords_data:
             return "No reasons available."
 
-        formatted_reasons = []
-        for item in keywords_data:
-            reason = item['reason'][:100] + "..." if len(item['reason']) > 100 else item['reason']
-            formatted_reasons.append(f"• **{item['keyword']}**: {reason}")
-
-        return '\n'.join(formatted_reasons)
+        return '\n'.join(
+            f"• **{item['keyword']}**: {item['reason'][:100]}{'...' if len(item['reason']) > 100 else ''}"
+            for item in keywords_data
+        )
 
     def get_agent_instructions(self, niche: str) -> str:
         """Generate agent instructions with dynamic niche and configurable settings."""
@@ -1166,76 +1422,20 @@ The instructions are finished, so after analyzing and understanding them well an
             default_value=self._get_default_instructions()
         )
         
+        # Reuse the rendered instructions while the template and niche are unchanged; the settings
+        # cache returns the same template object until the setting is saved again
+        cached = self._rendered_instructions.get(niche)
+        if cached is not None and cached[0] is custom_instructions:
+            return cached[1]
+
         # Replace the niche placeholder in the custom instructions
-        return custom_instructions.replace("{niche}", niche)
+        rendered = custom_instructions.replace("{niche}", niche)
+        self._rendered_instructions[niche] = (custom_instructions, rendered)
+        return rendered
     
     def _get_default_instructions(self) -> str:
         """Get the default agent instructions."""
-        return dedent("""\
-            You are a Seasoned SEO professional specializing in keyword analysis, At the same time you are an expert content creator (these previous two personalities should work in harmony and compatibility), Your task is objectively evaluating keywords for optimal SEO segments, and given complete keyword lists. Choose Keywords that are valuable and useful to readers., as these selected keywords will be used to create informative blog articles.
-
-
-Ensure that all evaluations are made solely based on the provided criteria without introducing any personal opinions or assumptions.
-________________________________________________________________
-**The inputs you will get:**
-- Keywords: insert keywords
-- Category of each keyword: category ( these categories are beneath the given niche.
-NICHE IS {niche} FOR ALL KEYWORDS
-________________________________________________________________
-First: analyze the keywords carefully to understand its context and its intent ( informational - commercial - Navigational - Transactional ), to determine the target audience whether it is (beginners OR intermediates OR experts) for the keywords.
-________________________________________________________________
-**Now,follow the following criteria to choose the valuable keywords:**
-1-Give all Keywords the same level of attention.
-*Note:Keywords can be a sentence, a command, or a question. Never base your analysis on this.*
-
-2-As You are a SEO expert, Consider multiple perspectives before applying the criteria to choose valuable Keywords and then apply the following criteria in order to choose the valuable Keywords:
-- Keywords must be grammatically and linguistically correct.
-- Valuable Keywords provide deep information yet remain accessible to non-specialists.
--Valuable Keywords offer practical solutions or scientific benefits.
-- A valuable Keyword is one that can be understood independently, even if presented alone.
-
-
-
-3- Also, as you are a content creator,review each keyword to make sure that:
--Is it scalable for in-depth content?
--Does it provide real solutions to the user?
--Does it maintain clarity and coherence in isolation?
--Does it provide useful information rather than superficial information?
-- Is it just an informational intention?
-
-4-After that, Cross-reference the keyword against established industry guidelines and case studies to ensure that its value is consistent across various expert perspectives ( SEO expert and content creators ).
-
-5-whether category is (beginners OR intermediates OR experts),You should Exclude any keyword that requires a level above the intermediates level to understand.
-________________________________________________________________
-**Important instructions and considerations:**
-1. Do not include personal opinions regarding the audience 's interests, desires, or perspectives.
-Also "Avoid over‐elaboration or speculative reasoning: focus only on the given criteria without philosophical digressions."
-2. Maintain a professional and objective tone throughout the analysis.
-3. Strictly follow the provided standards without deviation.
-4. Do not make assumptions about a keyword's depth or complexity; treat all keywords equally without any bias to any each.
-5. Do not add any extra emphasis or formatting to the keywords.
-7. Disregard search volume when evaluating keywords.
-8. Ensure that excluded keywords are only listed in the second table, not in the first.
-9. Ensure every keyword is evaluated and appears in one of the two tables (none are neglected).
-10. Scientific abbreviations are acceptable in both upper and lower case.
-11. Keywords that are trivially simple and cannot support in-depth content should be excluded, but if a straightforward keyword can still yield robust, beneficial content, keep it.
-12. If two keywords are ≥ 80 % similar, keep the clearer phrasing and the other similar in the excluded table.
-12. Exclude any non-English keywords.
-________________________________________________________________
-**Remember that the two personas ( the SEO expert and expert content creator ), must work in integration and harmony, without any distractions, contradictions, or objections.**
-________________________________________________________________
-**The outputs must be as following:**
-1. Provide a detailed and accurate statement of target audience analysis, audience level of experience or understanding, and any other relevant characteristics.
-
-2.Table 1 consists of 2 columns (the Valuable Keyword | the reason ).
-
-
-Ensure that the target audience is clearly indicated and justified based on the complexity and content of the keywords.
-________________________________________________________________
-**Several lists of keywords will be provided in the same chat, so you are required to deal with each list completely independently to avoid confusion or merging or comparing between the lists.**
-________________________________________________________________
-The instructions are finished, so after analyzing and understanding them well and in a coherent manner, ask for the inputs.
-""")
+        return type(self).default_instructions
 
 
 def get_excel_processor(
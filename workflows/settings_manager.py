@@ -1,46 +1,222 @@
-from typing import Optional, Dict, Any
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from db.session import get_db
+from db.session import session_scope
 from db.tables.workflow_settings import WorkflowSettings
 from agno.utils.log import logger
 import os
 import json
+import sqlite3
+import threading
+import time
+
+
+class DatabaseUnavailableError(Exception):
+    """Raised instead of trying the database while it is considered down."""
 
 
 class WorkflowSettingsManager:
     """Manager for workflow settings stored in the database."""
     
-    # Fallback file for settings when database is not available
-    FALLBACK_FILE = "tmp/workflow_settings.json"
-    
+    # Fallback SQLite file for settings when database is not available
+    FALLBACK_DB = "tmp/workflow_settings.sqlite"
+
+    # JSON file the fallback settings were kept in before, imported once into FALLBACK_DB
+    LEGACY_FALLBACK_FILE = "tmp/workflow_settings.json"
+
+    # Connection to FALLBACK_DB, opened on first use and shared by all threads under _fallback_lock
+    _fallback_conn: Optional[sqlite3.Connection] = None
+    _fallback_lock = threading.Lock()
+
+    # (read_at, value) keyed by (workflow_name, setting_key), None for settings that don't exist,
+    # and (read_at, settings) of get_all_settings keyed by workflow_name.
+    # Entries expire after _cache_ttl seconds so changes made by other processes are picked up,
+    # and are invalidated right away by save_setting and delete_setting.
+    _cache: Dict[tuple, tuple] = {}
+    _all_cache: Dict[str, tuple] = {}
+    _cache_ttl: float = 30.0
+    _cache_lock = threading.RLock()
+
+    # After a failed database access the database is skipped until _db_down_until (monotonic time),
+    # so callers go straight to the fallback instead of waiting for another connect timeout.
+    # The wait doubles with every failed retry up to _DB_MAX_BACKOFF seconds.
+    _DB_MIN_BACKOFF: float = 1.0
+    _DB_MAX_BACKOFF: float = 60.0
+    _db_down_until: float = 0.0
+    _db_backoff: float = _DB_MIN_BACKOFF
+    _db_breaker_lock = threading.Lock()
+
     @staticmethod
-    def _ensure_fallback_file():
-        """Ensure the fallback file exists."""
-        os.makedirs(os.path.dirname(WorkflowSettingsManager.FALLBACK_FILE), exist_ok=True)
-        if not os.path.exists(WorkflowSettingsManager.FALLBACK_FILE):
-            with open(WorkflowSettingsManager.FALLBACK_FILE, 'w') as f:
-                json.dump({}, f)
-    
+    def _cached(cache: Dict[Any, tuple], key: Any) -> tuple:
+        """
+        Look up a cache entry that hasn't expired yet.
+
+        Returns:
+            (True, value) on a hit, (False, None) otherwise
+        """
+        with WorkflowSettingsManager._cache_lock:
+            entry = cache.get(key)
+            if entry is None:
+                return False, None
+            read_at, value = entry
+            if time.monotonic() - read_at >= WorkflowSettingsManager._cache_ttl:
+                cache.pop(key, None)
+                return False, None
+            return True, value
+
     @staticmethod
-    def _load_fallback_settings() -> Dict[str, Any]:
-        """Load settings from fallback file."""
-        WorkflowSettingsManager._ensure_fallback_file()
+    def _store_cached(cache: Dict[Any, tuple], key: Any, value: Any):
+        """Remember a value read from the database."""
+        with WorkflowSettingsManager._cache_lock:
+            cache[key] = (time.monotonic(), value)
+
+    @staticmethod
+    @contextmanager
+    def _database_session() -> Iterator[Session]:
+        """
+        Database session for settings access that trips a circuit breaker on failure.
+
+        Raises:
+            DatabaseUnavailableError: If the database failed recently and the backoff hasn't passed
+        """
+        manager = WorkflowSettingsManager
+        with manager._db_breaker_lock:
+            retry_in = manager._db_down_until - time.monotonic()
+        if retry_in > 0:
+            raise DatabaseUnavailableError(f"database unavailable, retrying in {retry_in:.0f}s")
         try:
-            with open(WorkflowSettingsManager.FALLBACK_FILE, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.warning(f"Error loading fallback settings: {e}")
-            return {}
+            with session_scope() as db:
+                yield db
+        except SQLAlchemyError:
+            # Only database errors trip the breaker; bugs in the caller's block just propagate
+            with manager._db_breaker_lock:
+                manager._db_down_until = time.monotonic() + manager._db_backoff
+                manager._db_backoff = min(manager._db_backoff * 2, manager._DB_MAX_BACKOFF)
+            raise
+        with manager._db_breaker_lock:
+            manager._db_down_until = 0.0
+            manager._db_backoff = manager._DB_MIN_BACKOFF
+
+    @staticmethod
+    def clear_cache(workflow_name: Optional[str] = None, setting_key: Optional[str] = None):
+        """
+        Forget cached setting values, e.g. after the settings were changed outside this process.
+
+        Args:
+            workflow_name: Name of the workflow, clears every setting if not given
+            setting_key: Key of the setting, clears every setting of the workflow if not given
+        """
+        cache = WorkflowSettingsManager._cache
+        with WorkflowSettingsManager._cache_lock:
+            if workflow_name is None:
+                cache.clear()
+                WorkflowSettingsManager._all_cache.clear()
+                return
+            if setting_key is None:
+                for key in [key for key in cache if key[0] == workflow_name]:
+                    cache.pop(key, None)
+            else:
+                cache.pop((workflow_name, setting_key), None)
+            WorkflowSettingsManager._all_cache.pop(workflow_name, None)
     
     @staticmethod
-    def _save_fallback_settings(settings: Dict[str, Any]):
-        """Save settings to fallback file."""
-        WorkflowSettingsManager._ensure_fallback_file()
+    def _fallback_connection() -> sqlite3.Connection:
+        """Open the fallback database on first use. Callers must hold _fallback_lock."""
+        if WorkflowSettingsManager._fallback_conn is None:
+            os.makedirs(os.path.dirname(WorkflowSettingsManager.FALLBACK_DB), exist_ok=True)
+            # Autocommit, so every statement is its own atomic write
+            conn = sqlite3.connect(WorkflowSettingsManager.FALLBACK_DB, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS settings("
+                "workflow TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY(workflow, key))"
+            )
+            WorkflowSettingsManager._import_legacy_fallback_file(conn)
+            WorkflowSettingsManager._fallback_conn = conn
+        return WorkflowSettingsManager._fallback_conn
+
+    @staticmethod
+    def _import_legacy_fallback_file(conn: sqlite3.Connection):
+        """Move settings from the old JSON fallback file into the fallback database."""
+        legacy_file = WorkflowSettingsManager.LEGACY_FALLBACK_FILE
+        if not os.path.exists(legacy_file):
+            return
         try:
-            with open(WorkflowSettingsManager.FALLBACK_FILE, 'w') as f:
-                json.dump(settings, f, indent=2)
+            with open(legacy_file, 'r') as f:
+                settings = json.load(f)
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO settings(workflow, key, value) VALUES (?, ?, ?)",
+                    [
+                        (workflow_name, setting_key, setting_value)
+                        for workflow_name, workflow_settings in settings.items()
+                        for setting_key, setting_value in workflow_settings.items()
+                    ],
+                )
+            os.replace(legacy_file, legacy_file + ".imported")
+            logger.info(f"Imported fallback settings from {legacy_file}")
         except Exception as e:
-            logger.error(f"Error saving fallback settings: {e}")
+            logger.warning(f"Error importing legacy fallback settings: {e}")
+
+    @staticmethod
+    def _load_fallback_setting(workflow_name: str, setting_key: str) -> Optional[str]:
+        """Load a single setting from the fallback database."""
+        with WorkflowSettingsManager._fallback_lock:
+            row = WorkflowSettingsManager._fallback_connection().execute(
+                "SELECT value FROM settings WHERE workflow = ? AND key = ?", (workflow_name, setting_key)
+            ).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _load_fallback_settings(workflow_name: str) -> Dict[str, str]:
+        """Load all settings of a workflow from the fallback database."""
+        with WorkflowSettingsManager._fallback_lock:
+            rows = WorkflowSettingsManager._fallback_connection().execute(
+                "SELECT key, value FROM settings WHERE workflow = ?", (workflow_name,)
+            ).fetchall()
+        return dict(rows)
+
+    @staticmethod
+    def _save_fallback_setting(workflow_name: str, setting_key: str, setting_value: str):
+        """Save a single setting to the fallback database."""
+        with WorkflowSettingsManager._fallback_lock:
+            WorkflowSettingsManager._fallback_connection().execute(
+                "INSERT OR REPLACE INTO settings(workflow, key, value) VALUES (?, ?, ?)",
+                (workflow_name, setting_key, setting_value),
+            )
+
+    @staticmethod
+    def _save_fallback_settings(workflow_name: str, settings: Dict[str, str]):
+        """Save several settings of a workflow to the fallback database in one transaction."""
+        with WorkflowSettingsManager._fallback_lock:
+            conn = WorkflowSettingsManager._fallback_connection()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO settings(workflow, key, value) VALUES (?, ?, ?)",
+                    [(workflow_name, setting_key, setting_value) for setting_key, setting_value in settings.items()],
+                )
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _delete_fallback_setting(workflow_name: str, setting_key: str) -> bool:
+        """
+        Delete a single setting from the fallback database.
+
+        Returns:
+            True if the setting existed, False otherwise
+        """
+        with WorkflowSettingsManager._fallback_lock:
+            cursor = WorkflowSettingsManager._fallback_connection().execute(
+                "DELETE FROM settings WHERE workflow = ? AND key = ?", (workflow_name, setting_key)
+            )
+        return cursor.rowcount > 0
     
     @staticmethod
     def get_setting(workflow_name: str, setting_key: str, default_value: Optional[str] = None) -> Optional[str]:
@@ -55,32 +231,96 @@ class WorkflowSettingsManager:
         Returns:
             The setting value or default_value if not found
         """
+        cache_key = (workflow_name, setting_key)
+        hit, value = WorkflowSettingsManager._cached(WorkflowSettingsManager._cache, cache_key)
+        if hit:
+            return default_value if value is None else value
+
+        # Only cache what was read while the database was reachable, so a fallback value isn't kept
+        # once the database is back
+        database_read = False
         try:
             # Try database first
-            db = next(get_db())
-            setting = db.query(WorkflowSettings).filter(
-                WorkflowSettings.workflow_name == workflow_name,
-                WorkflowSettings.setting_key == setting_key,
-                WorkflowSettings.is_active == True
-            ).first()
-            
-            if setting:
-                return setting.setting_value
+            with WorkflowSettingsManager._database_session() as db:
+                # Only the value is needed, so select the column instead of loading an ORM object
+                setting_value = db.execute(
+                    select(WorkflowSettings.setting_value).where(
+                        WorkflowSettings.workflow_name == workflow_name,
+                        WorkflowSettings.setting_key == setting_key,
+                        WorkflowSettings.is_active.is_(True)
+                    ).limit(1)
+                ).scalar_one_or_none()
+                
+                if setting_value is not None:
+                    WorkflowSettingsManager._store_cached(
+                        WorkflowSettingsManager._cache, cache_key, setting_value
+                    )
+                    return setting_value
+            database_read = True
                 
         except Exception as e:
             logger.warning(f"Database access failed, using fallback: {e}")
         
         # Fallback to file-based storage
         try:
-            settings = WorkflowSettingsManager._load_fallback_settings()
-            workflow_settings = settings.get(workflow_name, {})
-            return workflow_settings.get(setting_key, default_value)
+            value = WorkflowSettingsManager._load_fallback_setting(workflow_name, setting_key)
+            if database_read:
+                WorkflowSettingsManager._store_cached(WorkflowSettingsManager._cache, cache_key, value)
+            return default_value if value is None else value
         except Exception as e:
             logger.error(f"Error loading fallback settings: {e}")
             return default_value
-        finally:
-            if 'db' in locals():
-                db.close()
+    
+    @staticmethod
+    def _upsert_settings(db: Session, workflow_name: str, settings: Dict[str, str], description: Optional[str] = None):
+        """
+        Insert or update settings of a workflow, reactivating deleted ones.
+
+        The description of an existing setting is only replaced when a description is given.
+        Commit is left to the caller.
+        """
+        rows = [
+            {
+                "workflow_name": workflow_name,
+                "setting_key": setting_key,
+                "setting_value": setting_value,
+                "description": description,
+                "is_active": True,
+            }
+            for setting_key, setting_value in settings.items()
+        ]
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = insert(WorkflowSettings).values(rows)
+            set_ = {
+                "setting_value": stmt.excluded.setting_value,
+                "is_active": True,
+                # onupdate defaults don't apply to ON CONFLICT DO UPDATE
+                "updated_at": func.now(),
+            }
+            if description:
+                set_["description"] = stmt.excluded.description
+            db.execute(
+                stmt.on_conflict_do_update(index_elements=["workflow_name", "setting_key"], set_=set_)
+            )
+        else:
+            existing_settings = {
+                setting.setting_key: setting
+                for setting in db.query(WorkflowSettings).filter(
+                    WorkflowSettings.workflow_name == workflow_name,
+                    WorkflowSettings.setting_key.in_(list(settings))
+                )
+            }
+            for row in rows:
+                existing_setting = existing_settings.get(row["setting_key"])
+                if existing_setting is None:
+                    db.add(WorkflowSettings(**row))
+                    continue
+                existing_setting.setting_value = row["setting_value"]
+                if description:
+                    existing_setting.description = description
+                existing_setting.is_active = True
     
     @staticmethod
     def save_setting(workflow_name: str, setting_key: str, setting_value: str, description: Optional[str] = None) -> bool:
@@ -98,55 +338,66 @@ class WorkflowSettingsManager:
         """
         try:
             # Try database first
-            db = next(get_db())
-            
-            # Check if setting already exists
-            existing_setting = db.query(WorkflowSettings).filter(
-                WorkflowSettings.workflow_name == workflow_name,
-                WorkflowSettings.setting_key == setting_key
-            ).first()
-            
-            if existing_setting:
-                # Update existing setting
-                existing_setting.setting_value = setting_value
-                if description:
-                    existing_setting.description = description
-                existing_setting.is_active = True
-            else:
-                # Create new setting
-                new_setting = WorkflowSettings(
-                    workflow_name=workflow_name,
-                    setting_key=setting_key,
-                    setting_value=setting_value,
-                    description=description,
-                    is_active=True
-                )
-                db.add(new_setting)
-            
-            db.commit()
+            with WorkflowSettingsManager._database_session() as db:
+                # Single INSERT ... ON CONFLICT instead of looking the setting up first
+                WorkflowSettingsManager._upsert_settings(db, workflow_name, {setting_key: setting_value}, description)
+                
+                db.commit()
+            WorkflowSettingsManager.clear_cache(workflow_name, setting_key)
             logger.info(f"Successfully saved setting {workflow_name}.{setting_key} to database")
             return True
             
         except Exception as e:
             logger.warning(f"Database save failed, using fallback: {e}")
-            if 'db' in locals():
-                db.rollback()
         
         # Fallback to file-based storage
         try:
-            settings = WorkflowSettingsManager._load_fallback_settings()
-            if workflow_name not in settings:
-                settings[workflow_name] = {}
-            settings[workflow_name][setting_key] = setting_value
-            WorkflowSettingsManager._save_fallback_settings(settings)
+            WorkflowSettingsManager._save_fallback_setting(workflow_name, setting_key, setting_value)
+            WorkflowSettingsManager.clear_cache(workflow_name, setting_key)
             logger.info(f"Successfully saved setting {workflow_name}.{setting_key} to fallback file")
             return True
         except Exception as e:
             logger.error(f"Error saving fallback settings: {e}")
             return False
-        finally:
-            if 'db' in locals():
-                db.close()
+    
+    @staticmethod
+    def save_settings_bulk(workflow_name: str, settings: Dict[str, str], description: Optional[str] = None) -> bool:
+        """
+        Save several settings of a workflow with a single statement and commit.
+
+        Args:
+            workflow_name: Name of the workflow
+            settings: Setting keys and the values to save
+            description: Optional description applied to every saved setting
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not settings:
+            return True
+
+        try:
+            # Try database first
+            with WorkflowSettingsManager._database_session() as db:
+                WorkflowSettingsManager._upsert_settings(db, workflow_name, settings, description)
+                
+                db.commit()
+            WorkflowSettingsManager.clear_cache(workflow_name)
+            logger.info(f"Successfully saved {len(settings)} settings of {workflow_name} to database")
+            return True
+            
+        except Exception as e:
+            logger.warning(f"Database save failed, using fallback: {e}")
+        
+        # Fallback to file-based storage
+        try:
+            WorkflowSettingsManager._save_fallback_settings(workflow_name, settings)
+            WorkflowSettingsManager.clear_cache(workflow_name)
+            logger.info(f"Successfully saved {len(settings)} settings of {workflow_name} to fallback file")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving fallback settings: {e}")
+            return False
     
     @staticmethod
     def get_all_settings(workflow_name: str) -> Dict[str, str]:
@@ -159,29 +410,33 @@ class WorkflowSettingsManager:
         Returns:
             Dictionary of setting keys and values
         """
+        hit, cached_settings = WorkflowSettingsManager._cached(WorkflowSettingsManager._all_cache, workflow_name)
+        if hit:
+            return dict(cached_settings)
+
         try:
             # Try database first
-            db = next(get_db())
-            settings = db.query(WorkflowSettings).filter(
-                WorkflowSettings.workflow_name == workflow_name,
-                WorkflowSettings.is_active == True
-            ).all()
-            
-            return {setting.setting_key: setting.setting_value for setting in settings}
+            with WorkflowSettingsManager._database_session() as db:
+                rows = db.execute(
+                    select(WorkflowSettings.setting_key, WorkflowSettings.setting_value).where(
+                        WorkflowSettings.workflow_name == workflow_name,
+                        WorkflowSettings.is_active.is_(True)
+                    )
+                ).all()
+                
+                all_settings = dict(rows)
+            WorkflowSettingsManager._store_cached(WorkflowSettingsManager._all_cache, workflow_name, all_settings)
+            return dict(all_settings)
                 
         except Exception as e:
             logger.warning(f"Database access failed, using fallback: {e}")
         
         # Fallback to file-based storage
         try:
-            settings = WorkflowSettingsManager._load_fallback_settings()
-            return settings.get(workflow_name, {})
+            return WorkflowSettingsManager._load_fallback_settings(workflow_name)
         except Exception as e:
             logger.error(f"Error loading fallback settings: {e}")
             return {}
-        finally:
-            if 'db' in locals():
-                db.close()
     
     @staticmethod
     def delete_setting(workflow_name: str, setting_key: str) -> bool:
@@ -197,31 +452,30 @@ class WorkflowSettingsManager:
         """
         try:
             # Try database first
-            db = next(get_db())
-            setting = db.query(WorkflowSettings).filter(
-                WorkflowSettings.workflow_name == workflow_name,
-                WorkflowSettings.setting_key == setting_key
-            ).first()
-            
-            if setting:
-                setting.is_active = False
-                db.commit()
-                logger.info(f"Successfully deleted setting {workflow_name}.{setting_key} from database")
-                return True
-            else:
-                logger.warning(f"Setting {workflow_name}.{setting_key} not found in database")
+            with WorkflowSettingsManager._database_session() as db:
+                # Single UPDATE; its rowcount tells whether the setting exists
+                result = db.execute(
+                    update(WorkflowSettings).where(
+                        WorkflowSettings.workflow_name == workflow_name,
+                        WorkflowSettings.setting_key == setting_key
+                    ).values(is_active=False)
+                )
+                
+                if result.rowcount:
+                    db.commit()
+                    WorkflowSettingsManager.clear_cache(workflow_name, setting_key)
+                    logger.info(f"Successfully deleted setting {workflow_name}.{setting_key} from database")
+                    return True
+                else:
+                    logger.warning(f"Setting {workflow_name}.{setting_key} not found in database")
                 
         except Exception as e:
             logger.warning(f"Database delete failed, using fallback: {e}")
-            if 'db' in locals():
-                db.rollback()
         
         # Fallback to file-based storage
         try:
-            settings = WorkflowSettingsManager._load_fallback_settings()
-            if workflow_name in settings and setting_key in settings[workflow_name]:
-                del settings[workflow_name][setting_key]
-                WorkflowSettingsManager._save_fallback_settings(settings)
+            if WorkflowSettingsManager._delete_fallback_setting(workflow_name, setting_key):
+                WorkflowSettingsManager.clear_cache(workflow_name, setting_key)
                 logger.info(f"Successfully deleted setting {workflow_name}.{setting_key} from fallback file")
                 return True
             else:
@@ -230,6 +484,3 @@ class WorkflowSettingsManager:
         except Exception as e:
             logger.error(f"Error deleting fallback settings: {e}")
             return False
-        finally:
-            if 'db' in locals():
-                db.close()
@@ -37,6 +37,9 @@ container_env = {
     "MIGRATE_DB": True,
 }
 
+# -*- Secrets shared by the dev apps
+dev_secrets_file = ws_settings.ws_root.joinpath("workspace/secrets/dev_app_secrets.yml")
+
 # -*- Streamlit running on port 8501:8501
 dev_streamlit = Streamlit(
     name=f"{ws_settings.ws_name}-ui",
@@ -49,7 +52,7 @@ dev_streamlit = Streamlit(
     env_vars=container_env,
     use_cache=True,
     # Read secrets from secrets/dev_app_secrets.yml
-    secrets_file=ws_settings.ws_root.joinpath("workspace/secrets/dev_app_secrets.yml"),
+    secrets_file=dev_secrets_file,
 )
 
 # -*- FastApi running on port 8000:8000
@@ -63,7 +66,7 @@ dev_fastapi = FastApi(
     env_vars=container_env,
     use_cache=True,
     # Read secrets from secrets/dev_app_secrets.yml
-    secrets_file=ws_settings.ws_root.joinpath("workspace/secrets/dev_app_secrets.yml"),
+    secrets_file=dev_secrets_file,
 )
 
 # -*- Dev DockerResources